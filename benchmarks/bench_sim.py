@@ -0,0 +1,230 @@
+"""
+Benchmarks of Ant One's simulation, run headless.
+
+Each scenario (engine x ants x food) runs in its own process so that peak RSS is
+its own. That process is not a daemon, so that the sharded engine can start its workers. Results are written as JSON, and can be compared with a previous run:
+
+    PYTHONPATH=src python benchmarks/bench_sim.py --output bench.json
+    PYTHONPATH=src python benchmarks/bench_sim.py --baseline bench.json --threshold 0.15
+
+The comparison exits with status 1 if any metric regressed beyond the threshold.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import multiprocessing
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+
+from ant_one.game_resources import Colony, Food, Job, create_game
+from ant_one.shards import ShardedColony
+from ant_one.sim import ENGINES
+from ant_one.tau import Tau
+
+
+# Metric name -> True if higher is better
+METRICS = {
+    'ticks_per_s': True,
+    'us_per_react_to_position': False,
+    'us_per_clamp': False,
+    'us_per_gen_random_movement': False,
+    'us_per_nearest_food': False,
+    'us_per_foraging_live': False,
+    'peak_rss_mb': False,
+    'bytes_per_ant': False,
+}
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def time_per_call(func, budget: float) -> float:
+    """Microseconds per call of func, repeated for about budget seconds"""
+    timer = timeit.Timer(func)
+    n, duration = timer.autorange()
+    n = max(n, int(n * budget / duration)) if duration else n
+    return min(timer.repeat(repeat=3, number=n)) / n * 1e6
+
+
+def run_scenario(engine: str, n_ants: int, n_food: int, budget: float, seed: int) -> dict:
+    """Builds a game and measures it. Meant to run in a fresh process"""
+    logging.disable(logging.INFO)
+
+    # Memory per ant, traced on a sample to keep tracemalloc overhead out of peak RSS
+    n_sample = min(n_ants, 10000)
+    if n_sample:
+        _, _, sample = create_game(Tau(seed=seed), px_size=(1000, 600), n_ants=0, colony_cls=ENGINES[engine])
+        tracemalloc.start()
+        sample.populate(n_sample)
+        bytes_per_ant = tracemalloc.get_traced_memory()[0] / n_sample
+        tracemalloc.stop()
+        if isinstance(sample, ShardedColony):
+            sample.close()
+        del sample
+
+    tau = Tau(seed=seed)
+    world, nest, colony = create_game(tau, px_size=(1000, 600), n_ants=n_ants, colony_cls=ENGINES[engine])
+    for _ in range(n_food):
+        world.add_object(Food(world.gen_random_position()))
+    try:
+        return measure(tau, colony, budget, bytes_per_ant if n_sample else None)
+    finally:
+        if isinstance(colony, ShardedColony):
+            colony.close()  # Stops workers and frees shared memory
+
+
+def measure(tau: Tau, colony: Colony, budget: float, bytes_per_ant: float | None) -> dict:
+    """Metrics of a built game, see METRICS"""
+    # Ticks of the living_objects loop, best of 5 rounds of at least 3 ticks
+    tau.run(1)  # Warm-up
+    ticks, best = 0, 0
+    for _ in range(5):
+        round_ticks, rt_start = 0, time.perf_counter()
+        while round_ticks < 3 or time.perf_counter() - rt_start < budget/5:
+            tau.run(1)
+            round_ticks += 1
+        best = max(best, round_ticks / (time.perf_counter() - rt_start))
+        ticks += round_ticks
+    result = {'ticks': ticks, 'ticks_per_s': best}
+    if bytes_per_ant is not None:
+        result['bytes_per_ant'] = bytes_per_ant
+
+    # Per-call costs of the scalar hot path, on an ant far from every object
+    if type(colony) is Colony and colony.population:
+        ant = colony.population[0]
+        new_x, new_y, _, _ = ant.gen_random_movement()
+        result['us_per_react_to_position'] = time_per_call(ant.react_to_position, budget/4)
+        result['us_per_clamp'] = time_per_call(lambda: colony.world.clamp(new_x, new_y), budget/4)
+        result['us_per_gen_random_movement'] = time_per_call(ant.gen_random_movement, budget/4)
+        world = colony.world
+        result['us_per_nearest_food'] = time_per_call(
+            lambda: world.food_index.nearest_one(new_x, new_y, world.food_sense_radius), budget/4
+        )
+        # What a forager costs each tick of the object engine: move, sense food, react
+        ant.job = Job.FORAGING
+        result['us_per_foraging_live'] = time_per_call(ant.live, budget/4)
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def scenario_process(conn, *args) -> None:
+    """Process target: sends the result of run_scenario(*args) through conn"""
+    conn.send(run_scenario(*args))
+    conn.close()
+
+
+def run_isolated(*args) -> dict:
+    """run_scenario(*args) in a fresh, non-daemon process, so that peak RSS is its own"""
+    context = multiprocessing.get_context('spawn')
+    conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=scenario_process, args=(child_conn, *args))
+    process.start()
+    child_conn.close()
+    try:
+        result = conn.recv()
+    except EOFError:
+        result = None
+    process.join()
+    conn.close()
+    if result is None:
+        raise RuntimeError(f'Scenario {args} failed, exit code {process.exitcode}')
+    return result
+
+
+def scenario_key(engine: str, n_ants: int, n_food: int) -> str:
+    return f'{engine}/ants={n_ants}/food={n_food}'
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lists metrics of results that regressed by more than threshold from baseline"""
+    regressions = []
+    for key, result in results.items():
+        for metric, higher_is_better in METRICS.items():
+            new, old = result.get(metric), baseline.get(key, {}).get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f'{key} {metric}: {old:.4g} -> {new:.4g} ({change:+.0%})')
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmarks the Ant One simulation')
+    parser.add_argument('--ants', type=int, nargs='+', default=[10, 1000, 10000, 100000])
+    parser.add_argument('--food', type=int, nargs='+', default=[0, 1000])
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    parser.add_argument('--budget', type=float, default=2, help='seconds spent measuring each scenario')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='JSON file where results are written')
+    parser.add_argument('--baseline', help='JSON file of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.15, help='tolerated relative regression')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = {}
+    for engine in args.engines:
+        for n_ants in args.ants:
+            for n_food in args.food:
+                key = scenario_key(engine, n_ants, n_food)
+                results[key] = run_isolated(engine, n_ants, n_food, args.budget, args.seed)
+                print(f'{key:<32} {results[key]["ticks_per_s"]:>10.1f} ticks/s  '
+                      f'{results[key]["peak_rss_mb"] or 0:>8.1f} MB peak', flush=True)
+
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'budget': args.budget,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+        print(f'No regression beyond {args.threshold:.0%}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,7 @@ import toga
 from .playscreen import PlayScreen
 from .pimpscreen import PimpScreen
 from .user_settings import UserSettings
+from .events import log_events
 from .tau import Tau
 
 
@@ -33,8 +34,9 @@ class AntOne(toga.App):
         app_posy = (self.screen_size[1]-self.app_size[1])/2
 
         # User settings
-        user_setting_path = self.paths.data / 'user_settings.pkl'
+        user_setting_path = self.paths.data / 'user_settings.json'
         self.settings = UserSettings(user_setting_path)
+        self.on_exit = self.save_and_exit
 
         # Screens
         self.playscreen_is_open = False
@@ -42,6 +44,7 @@ class AntOne(toga.App):
 
         # Time engine
         self.tau = Tau()
+        self.tau.events.subscribe(log_events)
 
         # Layout assembly
         self.main_window = toga.Window(
@@ -77,6 +80,10 @@ class AntOne(toga.App):
     async def on_running(self, **kwargs):
         await self.tau.event_loop_manager()
 
+    def save_and_exit(self, app, **kwargs):
+        self.settings.flush()
+        return True
+
     
 def main():
     return AntOne()
@@ -0,0 +1,77 @@
+"""
+Camera of the play screen.
+Its purpose is to:
+- Map World coordinates to canvas pixels, for whole arrays of positions at once
+- Pan and zoom, while keeping the view over the World
+- Tell what part of the World is visible, so that the renderer only draws that
+"""
+
+import numpy as np
+
+
+class Camera():
+    """Maps World coordinates to canvas pixels: pixel = (world - origin) * zoom
+    world_size: (width, height) in game units
+    view_px: (width, height) of the canvas in pixels
+    At first the whole World is in view, which is also the lowest zoom"""
+    def __init__(self, world_size: tuple[float, float], view_px: tuple[int, int], max_zoom: float=8) -> None:
+        self.world_size = world_size
+        self.view_px = view_px
+        self.min_zoom = min(view_px[0]/world_size[0], view_px[1]/world_size[1])
+        self.max_zoom = max(max_zoom, self.min_zoom)
+        self.zoom = self.min_zoom  # Pixels per game unit
+        self.x, self.y = 0, 0  # World point at the top left corner of the canvas
+        self.version = 0  # Changes whenever the view does
+        self.clamp()
+
+    def to_screen(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return (xs - self.x) * self.zoom, (ys - self.y) * self.zoom
+
+    def to_world(self, px: float, py: float) -> tuple[float, float]:
+        return self.x + px/self.zoom, self.y + py/self.zoom
+
+    def visible_rect(self, margin_px: float=0) -> tuple[float, float, float, float]:
+        """World rectangle (x0, y0, x1, y1) in view, widened by margin_px pixels"""
+        margin = margin_px / self.zoom
+        return (
+            self.x - margin,
+            self.y - margin,
+            self.x + self.view_px[0]/self.zoom + margin,
+            self.y + self.view_px[1]/self.zoom + margin
+        )
+
+    def shows_all(self) -> bool:
+        """Whether the whole World is in view"""
+        x0, y0, x1, y1 = self.visible_rect()
+        return x0 <= 0 and y0 <= 0 and x1 >= self.world_size[0] and y1 >= self.world_size[1]
+
+    def visible(self, xs: np.ndarray, ys: np.ndarray, margin_px: float=0) -> np.ndarray:
+        """Mask of positions in view"""
+        x0, y0, x1, y1 = self.visible_rect(margin_px)
+        return (xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)
+
+    def pan(self, dx_px: float, dy_px: float) -> None:
+        """Moves the World by dx_px, dy_px pixels on the canvas, as when dragged"""
+        self.x -= dx_px / self.zoom
+        self.y -= dy_px / self.zoom
+        self.clamp()
+
+    def zoom_at(self, factor: float, px: float, py: float) -> None:
+        """Zooms by factor, keeping the World point under pixel (px, py) in place"""
+        x, y = self.to_world(px, py)
+        self.zoom = min(max(self.zoom*factor, self.min_zoom), self.max_zoom)
+        self.x, self.y = x - px/self.zoom, y - py/self.zoom
+        self.clamp()
+
+    def clamp(self) -> None:
+        """Keeps the view over the World"""
+        self.x = clamp_origin(self.x, self.view_px[0]/self.zoom, self.world_size[0])
+        self.y = clamp_origin(self.y, self.view_px[1]/self.zoom, self.world_size[1])
+        self.version += 1
+
+
+def clamp_origin(origin: float, view: float, world: float) -> float:
+    """Origin of a view along one axis, centered if the World is smaller than the view"""
+    if view >= world:
+        return (world - view) / 2
+    return min(max(origin, 0), world - view)
@@ -1,6 +1,10 @@
 
+import functools
 import logging
 import math
+from collections import OrderedDict
+
+import numpy as np
 
 
 def line_segments_gen(points, x_mirror=False):
@@ -22,6 +26,59 @@ def line_segments_gen(points, x_mirror=False):
         yield round(x), round(y)
 
 
+# Ant drawing, in polar form for line_segments_gen
+ANT_LEG_POINTS = {
+    'top': [(35, 0), (45, 90), (50, 150)],
+    'mid': [(45, 0), (50, 80), (50, 30)],
+    'back': [(60, 0), (40, 60), (50, 20)]
+}
+ANT_ANTENNA_POINTS = [(0, 0), (30, 90+45), (30, 160)]
+
+
+@functools.cache
+def ant_geometry() -> dict[str, tuple]:
+    """Polylines of the ant drawing at scale 1, computed once.
+    legs, antennae: tuples of polylines, both sides of the body"""
+    return {
+        'legs': tuple(
+            tuple(line_segments_gen(points, x_mirror=x_mirror))
+            for points in ANT_LEG_POINTS.values()
+            for x_mirror in (False, True)
+        ),
+        'antennae': tuple(
+            tuple(line_segments_gen(ANT_ANTENNA_POINTS, x_mirror=x_mirror))
+            for x_mirror in (False, True)
+        ),
+    }
+
+
+class SpriteCache():
+    """LRU cache of drawings recorded once as canvas sub-contexts, then reused by reference.
+    Keys should include everything the drawing depends on, starting with the canvas"""
+    def __init__(self, maxsize: int=32) -> None:
+        self.maxsize = maxsize
+        self.sprites = OrderedDict()
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def draw(self, context, key, draw_func, *args) -> None:
+        """Appends the sprite of key to context, recording it with draw_func(sprite, *args) if needed"""
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            context.append(sprite)
+            return
+        with context.Context() as sprite:
+            draw_func(sprite, *args)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.maxsize:
+            self.sprites.popitem(last=False)
+
+
+ANT_SPRITES = SpriteCache()
+
+
 def draw_ant(
         context,
         pimp_color_legs,
@@ -38,21 +95,35 @@ def draw_ant(
     pimp_color_body: body (head, thorax, abdomen)    
     translate: possibility to move the drawing
     scale: scaling factor, <1 to reduce size
-    rotation: rotation in radians"""
+    rotation: rotation in radians
+    
+    The drawing is cached as a sprite by colors and scale, see ANT_SPRITES"""
+    with context.Context() as placed:
+        placed.translate(*translate)
+        placed.scale(scale, scale)
+        placed.rotate(rotate)
+        ANT_SPRITES.draw(
+            placed,
+            (context.canvas, pimp_color_legs, pimp_color_antennae, pimp_color_body, scale),
+            draw_ant_paths,
+            pimp_color_legs, pimp_color_antennae, pimp_color_body, scale
+        )
 
-    context.translate(*translate)
-    context.scale(scale, scale)
-    context.rotate(rotate)
 
+def draw_ant_paths(
+        context,
+        pimp_color_legs,
+        pimp_color_antennae,
+        pimp_color_body,
+        scale
+    ):
+    """Draws the ant at the origin of context, scale only sets line widths"""
     def get_line_width(at_scale_1, scale):
         return scale*at_scale_1
     
+    geometry = ant_geometry()
+
     # Draw legs
-    leg_points = {
-        'top': [(35, 0), (45, 90), (50, 150)],
-        'mid': [(45, 0), (50, 80), (50, 30)],
-        'back': [(60, 0), (40, 60), (50, 20)]
-    }
     with (
         context.Stroke(
             0, 0, color=pimp_color_legs, line_width=get_line_width(5, scale)
@@ -61,39 +132,19 @@ def draw_ant(
             color=pimp_color_legs
         ) as fill
     ):
-        for leg in leg_points.keys():
-            for i, coords in enumerate(line_segments_gen(leg_points[leg])):
-                if i == 0:
-                    stroke.move_to(*coords)
-                else:
-                    stroke.line_to(*coords)
-                    fill.move_to(*coords)
-                    fill.arc(*coords, radius=4)
-            for i, coords in enumerate(line_segments_gen(leg_points[leg], x_mirror=True)):
-                if i == 0:
-                    stroke.move_to(*coords)
-                else:
-                    stroke.line_to(*coords)
-                    fill.move_to(*coords)
-                    fill.arc(*coords, radius=4)
+        for leg in geometry['legs']:
+            stroke.move_to(*leg[0])
+            for coords in leg[1:]:
+                stroke.line_to(*coords)
+                fill.move_to(*coords)
+                fill.arc(*coords, radius=4)
 
     # Draw antennae
-    antenna_points = {
-        '_': [(0, 0), (30, 90+45), (30, 160)]
-    }
     with context.Stroke(0, 0, color=pimp_color_antennae, line_width=get_line_width(2, scale)) as stroke:
-        for i, coords in enumerate(line_segments_gen(antenna_points['_'])):
-            if i == 0:
-                stroke.move_to(*coords)
-            else:
+        for antenna in geometry['antennae']:
+            stroke.move_to(*antenna[0])
+            for coords in antenna[1:]:
                 stroke.line_to(*coords)
-                fill.move_to(*coords)
-        for i, coords in enumerate(line_segments_gen(antenna_points['_'], x_mirror=True)):
-            if i == 0:
-                stroke.move_to(*coords)
-            else:
-                stroke.line_to(*coords)
-                fill.move_to(*coords)
 
     # Draw body
     head1_st = (0, -20)
@@ -132,38 +183,80 @@ def draw_nest_entrance(
         fill.arc(x=to_px(x), y=to_px(y), radius=to_px(radius))
 
 
-def draw_food(
+MINI_ANT_BODY_COLOR = '#9BC3E5'
+MINI_ANT_CONTOUR_COLOR = '#5B9BD5'
+
+
+def draw_foods(
         context,
-        to_px,
-        x,
-        y
+        xs,
+        ys
     ):
+    """All food in one fill, as blue dots. xs, ys are in pixels"""
     with context.Fill(color='blue') as fill:
-        fill.move_to(to_px(x), to_px(y))
-        fill.arc(x=to_px(x), y=to_px(y), radius=5)
+        for x, y in zip(xs, ys):
+            fill.move_to(x+5, y)
+            fill.arc(x=x, y=y, radius=5)
 
 
-def draw_mini_ant(
+def draw_mini_ants(
         context,
-        to_px,
-        x,
-        y,
-        o
+        xs,
+        ys,
+        os
     ):
-    body_clr = '#9BC3E5'
-    contour_clr = '#5B9BD5'
-    with context.Context() as sub_context:
-        sub_context.translate(to_px(x), to_px(y))
-        sub_context.rotate(o-math.pi/4)
-
-        with sub_context.Fill(color=contour_clr) as fill:
-            fill.rect(x=0, y=0, width=6, height=6)
-        with sub_context.Stroke(color=contour_clr, line_width=1) as fill:
-            fill.rect(x=0, y=0, width=6, height=6)
-        with sub_context.Fill(color=body_clr) as fill:
-            fill.arc(x=5, y=5, radius=5)
-        with sub_context.Stroke(color=contour_clr, line_width=1) as fill:
-            fill.arc(x=5, y=5, radius=5)
-        
-        context.append(sub_context)
-    
+    """Mini ants, a square under a disc turned by orientation: all ants share four paths.
+    xs, ys are arrays in pixels, os are orientations"""
+    body_clr = MINI_ANT_BODY_COLOR
+    contour_clr = MINI_ANT_CONTOUR_COLOR
+    theta = np.asarray(os) - math.pi/4
+    cos, sin = np.cos(theta), np.sin(theta)
+
+    # Corners of the 6x6 square and center of the body, rotated around the ant position
+    square = [(0, 0), (6, 0), (6, 6), (0, 6)]
+    corners = [(xs + u*cos - v*sin, ys + u*sin + v*cos) for u, v in square]
+    body_xs, body_ys = xs + 5*cos - 5*sin, ys + 5*sin + 5*cos
+
+    def square_paths(path):
+        for ant_corners in zip(*(zip(cx.tolist(), cy.tolist()) for cx, cy in corners)):
+            path.move_to(*ant_corners[0])
+            for corner in ant_corners[1:]:
+                path.line_to(*corner)
+            path.close_path()
+
+    def body_paths(path):
+        for x, y in zip(body_xs.tolist(), body_ys.tolist()):
+            path.move_to(x+5, y)
+            path.arc(x=x, y=y, radius=5)
+
+    with context.Fill(color=contour_clr) as fill:
+        square_paths(fill)
+    with context.Stroke(color=contour_clr, line_width=1) as stroke:
+        square_paths(stroke)
+    with context.Fill(color=body_clr) as fill:
+        body_paths(fill)
+    with context.Stroke(color=contour_clr, line_width=1) as stroke:
+        body_paths(stroke)
+
+
+# From sparse to crowded
+DENSITY_COLORS = ('#DCE9F5', '#BDD7EE', '#9BC3E5', '#5B9BD5', '#2E75B6', '#1F4E79')
+
+
+def draw_density(
+        context,
+        xs,
+        ys,
+        levels,
+        cell_size,
+        colors=DENSITY_COLORS
+    ):
+    """Density layer: one square per cell, one fill per level.
+    xs, ys are arrays of top left corners in pixels, levels are indices in colors"""
+    for level, color in enumerate(colors):
+        in_level = levels == level
+        if not in_level.any():
+            continue
+        with context.Fill(color=color) as fill:
+            for x, y in zip(xs[in_level].tolist(), ys[in_level].tolist()):
+                fill.rect(x=x, y=y, width=cell_size, height=cell_size)
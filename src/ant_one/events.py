@@ -0,0 +1,94 @@
+"""
+Events is Ant One's log of what happens in the simulation.
+Its purpose is to:
+- Record events (births, job allocations, food found or spawned) as small tuples, cheap enough for the hot path
+- Keep the last events in a preallocated ring buffer, whatever the number of ants
+- Hand events to subscribers outside of ticks, or to anyone draining them
+- Format events as text only when someone reads them
+
+Tau owns the log of a game: tau.events.
+"""
+
+import logging
+from enum import IntEnum
+
+
+class EventKind(IntEnum):
+    BIRTH = 0  # a: idno of the first ant born, b: number of ants born
+    JOBS_ALLOCATED = 1  # a: number of ants whose job changed, b: number of ants by Job
+    FOOD_FOUND = 2  # a: ant idno, b, c: x, y of the food
+    FOOD_SPAWNED = 3  # a, b: x, y of the food
+
+
+FORMATS = {
+    EventKind.BIRTH: lambda a, b, c: f'Ant #{a} born' if b == 1 else f'{b} ants born, #{a} to #{a+b-1}',
+    EventKind.JOBS_ALLOCATED: lambda a, b, c: (
+        f'Jobs allocated, {a} changed: ' + ', '.join(f'{count} {job.value}' for job, count in b.items())
+    ),
+    EventKind.FOOD_FOUND: lambda a, b, c: f'Ant #{a} found food @({b:.0f}, {c:.0f})',
+    EventKind.FOOD_SPAWNED: lambda a, b, c: f'Food spawned @({a:.0f}, {b:.0f})',
+}
+
+
+def format_event(event: tuple) -> str:
+    loopno, kind, a, b, c = event
+    return f'[{loopno}] {FORMATS[kind](a, b, c)}'
+
+
+def log_events(events: list[tuple]) -> None:
+    """Subscriber writing events to the log"""
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        return
+    for event in events:
+        logging.info(format_event(event))
+
+
+class EventLog():
+    """Last events of a game, in a ring buffer.
+    An event is a tuple (loopno, kind, a, b, c): fields a, b and c depend on kind, see EventKind.
+    Readers keep a cursor, the number of events emitted when they last read"""
+    def __init__(self, tau, size: int=4096) -> None:
+        self.tau = tau
+        self.events = [None] * size
+        self.count = 0  # Events emitted since start
+        self.subscribers = []  # [callback, kinds, cursor]
+
+    def emit(self, kind: EventKind, a=None, b=None, c=None) -> None:
+        self.events[self.count % len(self.events)] = (self.tau.loopno, kind, a, b, c)
+        self.count += 1
+
+    def drain(self, cursor: int) -> tuple[list[tuple], int, int]:
+        """Returns events emitted since cursor, the new cursor,
+        and the number of events overwritten before they could be read"""
+        size = len(self.events)
+        dropped = max(0, self.count - cursor - size)
+        start = cursor + dropped
+        if start == self.count:
+            return [], self.count, dropped
+        i, j = start % size, self.count % size
+        events = self.events[i:j] if i < j else self.events[i:] + self.events[:j]
+        return events, self.count, dropped
+
+    def subscribe(self, callback, kinds: set[EventKind] | None=None, replay: bool=False) -> list:
+        """callback receives lists of events of kinds (all if None) when Tau dispatches them.
+        replay: also receive the events still held. Returns a handle for unsubscribe"""
+        subscriber = [callback, kinds, max(0, self.count - len(self.events)) if replay else self.count]
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: list) -> None:
+        self.subscribers.remove(subscriber)
+
+    def dispatch(self) -> None:
+        """Hands new events to subscribers. Called by Tau between ticks"""
+        for subscriber in self.subscribers:
+            callback, kinds, cursor = subscriber
+            if cursor == self.count:
+                continue
+            events, subscriber[2], dropped = self.drain(cursor)
+            if dropped:
+                logging.warning(f'{dropped} events dropped before {callback.__name__} could read them')
+            if kinds is not None:
+                events = [event for event in events if event[1] in kinds]
+            if events:
+                callback(events)
@@ -1,46 +1,83 @@
 
-import logging
 import math
-import random
 from enum import Enum
-from functools import partial
 
+import numpy as np
+
+from .events import EventKind
+from .pheromones import PheromoneField
 from .tau import Tau
-from .world_physics import Length, Position
-from .drawings import draw_nest_entrance, draw_food
+from .world_physics import Length, NearestIndex, Position, SpatialHash
 
 
 class World():
     """Defines the environment where the game happens.
     tau: Time engine handling objects and events
     px_size: Canvas area available in pixels
+    size: World dimensions in game units, px_size if not given
     
-    to_px: Converter from World dimension to pixels. Assumes that ratio is the same on both axis."""
-    def __init__(self, tau: Tau, px_size: int) -> None:
+    index: Spatial index of nonliving objects, kept in sync by add_object/remove_object
+    food_index: Nearest neighbour index of food, kept in sync the same way, see nearest_food
+    pheromones: Trails left by ants, updated at their own period
+    living_objects: Objects whose live() Tau calls every tick, in order of arrival. Sleeping ones leave it"""
+    def __init__(self, tau: Tau, px_size: tuple[int, int], size: tuple[int, int] | None=None) -> None:
         self.tau = tau
+        self.rng = self.tau.random_stream('world')
         self.px_size = px_size  # e.g. 1000
-        self.size = px_size  # e.g. 5000
+        self.size = size or px_size  # e.g. 5000
         self.no_go_border = 20  # In game units
+        self.contact_radius = 10  # Distance at which ants notice objects
+        self.food_sense_radius = 60  # Distance at which foraging ants sense food
 
         self.nonliving_objects = []
-        self.living_objects = [self]
+        self.nonliving_version = 0  # Changes whenever nonliving_objects does
+        self.living_objects = {}  # Ordered set: object -> None
+        self.index = SpatialHash(self.size, cell_size=self.contact_radius)
+        self.food_index = NearestIndex(self.size, cell_size=self.food_sense_radius/3)
+        # Food rolls happen every virtual second, so that spawn rate does not depend on step size
+        self.food_timer = self.tau.scheduler.every(1, self.roll_food)
+        self.pheromones = PheromoneField(self)
     
     def add_life(self, object):
-        self.living_objects.append(object)
+        self.living_objects[object] = None
+
+    def remove_life(self, object):
+        self.living_objects.pop(object, None)
+    
+    def add_object(self, object):
+        self.nonliving_objects.append(object)
+        self.index.insert(object)
+        if isinstance(object, Food):
+            self.food_index.insert(object)
+        self.nonliving_version += 1
+    
+    def remove_object(self, object):
+        self.nonliving_objects.remove(object)
+        self.index.remove(object)
+        if isinstance(object, Food):
+            self.food_index.remove(object)
+        self.nonliving_version += 1
+
+    def nearest_food(self, xs: np.ndarray, ys: np.ndarray, k: int=1,
+                     radius: float | None=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """k nearest food within radius (food_sense_radius if not given) of many positions at once.
+        Returns distances, x and y of food, see NearestIndex.nearest"""
+        return self.food_index.nearest(xs, ys, radius or self.food_sense_radius, k)
     
-    def live(self):
-        add_food = random.random() * self.tau.vt_loop_duration
-        if add_food >= 0.7:
-            self.nonliving_objects.append(Food(self.gen_random_position()))
+    def objects_near(self, position: Position, radius: Length) -> list:
+        return self.index.query(position, radius)
     
-    def to_px(self, x: Length) -> int:
-        return round(x*self.px_size[0]/self.size[0])
+    def roll_food(self):
+        if self.rng.random() >= 0.7:
+            position = self.gen_random_position()
+            self.add_object(Food(position))
+            self.tau.events.emit(EventKind.FOOD_SPAWNED, position.x, position.y)
     
     def make_nest(self) -> tuple[Position, Length]:
         return (
             Position(
-                random.randint(round(self.size[0]*0.1), int(self.size[0]*0.9)), 
-                random.randint(round(self.size[1]*0.1), int(self.size[1]*0.9))
+                self.rng.randint(round(self.size[0]*0.1), int(self.size[0]*0.9)), 
+                self.rng.randint(round(self.size[1]*0.1), int(self.size[1]*0.9))
             ),
             Length(round(self.size[0]*0.1))
         )
@@ -54,56 +91,41 @@ class World():
             min_y, max_y = self.no_go_border, self.size[1]-self.no_go_border
             
         return Position(
-                random.randint(min_x, max_x), 
-                random.randint(min_y, max_y)
+                self.rng.randint(min_x, max_x), 
+                self.rng.randint(min_y, max_y)
             )
     
     def make_position_around(self, point: Position, radius: int=0) -> Position:
-        theta = 2*math.pi*random.random()
+        theta = 2*math.pi*self.rng.random()
         x = point.x + radius * math.cos(theta)
         y = point.y + radius * math.sin(theta)
         return Position(x, y, theta)
     
-    def validate_position(self, position: Position) -> tuple[bool, Position]:
-        validated = True
-        new_x, new_y = None, None
-        if position.x < self.no_go_border:
-            validated = False
-            new_x = self.no_go_border
-        elif position.x > self.size[0]-self.no_go_border:
-            validated = False
-            new_x = self.size[0]-self.no_go_border
-        if position.y < self.no_go_border:
-            validated = False
-            new_y = self.no_go_border
-        elif position.y > self.size[1]-self.no_go_border:
-            validated = False
-            new_y = self.size[1]-self.no_go_border
-
-        if validated:
-            return True, position
-        return (
-            False,
-            Position(
-                new_x or position.x,
-                new_y or position.y,
-                position.o
-            )
-        )
+    def clamp(self, x: float, y: float) -> tuple[float, float, bool]:
+        """Brings coordinates back within borders. Returns x, y and whether they were valid"""
+        min_x, min_y = self.no_go_border, self.no_go_border
+        max_x, max_y = self.size[0]-self.no_go_border, self.size[1]-self.no_go_border
+        if min_x <= x <= max_x and min_y <= y <= max_y:
+            return x, y, True
+        return min(max(x, min_x), max_x), min(max(y, min_y), max_y), False
 
 
 class Nest():
-    """Defines where the colony of Ant One lives"""
-    def __init__(self, world: World) -> None:
+    """Defines where the colony of Ant One lives
+    position, radius: drawn at random if not given, e.g. when a game is loaded"""
+    def __init__(self, world: World, position: Position | None=None, radius: int | None=None) -> None:
         self.world = world
-        self.position, radius_max = self.world.make_nest()
-        self.radius = random.randint(
-            round(radius_max*0.05),
-            round(radius_max*0.10)
-        )
+        if position is None:
+            position, radius_max = self.world.make_nest()
+            radius = self.world.rng.randint(
+                round(radius_max*0.05),
+                round(radius_max*0.10)
+            )
+        self.position = position
+        self.radius = radius
         self.attraction_radius = 10
-        self.draw = partial(draw_nest_entrance, x=self.x, y=self.y, radius=self.radius)
-        self.world.nonliving_objects.append(self)
+        self.rest_radius = self.radius/2  # Jobless ants getting that close to the center take a nap
+        self.world.add_object(self)
     
     def give_newborn_position(self) -> Position:
         """Generates a newborn position around the nest"""
@@ -126,22 +148,126 @@ class Colony():
     def __init__(self, nest: Nest) -> None:
         self.nest = nest
         self.world = self.nest.world
+        self.rng = self.world.tau.random_stream('colony')  # Births
+        self.ants_rng = self.world.tau.random_stream('colony/ants')  # Shared by all ants, in turn
         self.population = []
         self.ant_idno = 0
 
+        # Trails, opt-in: ants that found food with more food around mark their way for a while,
+        # fading as they go so that the gradient leads back to the food. Foragers follow marks
+        self.follow_trails = False
+        self.trail_duration = 5  # Virtual seconds, a few food_sense_radius at full pace
+        self.trail_strength = 1  # Pheromone per virtual second, when the trail starts
+        self.max_steering = math.pi  # Radians per virtual second
+
         self.stock_food = 5.5
         # Needs is the base to define what job will be given to ants
         self.needs = { need: 0 for need in ColonyNeed }
-        self.world.add_life(self)
+
+        scheduler = self.world.tau.scheduler
+        self.upkeep_timer = scheduler.every(1, self.upkeep, 1)
+
+        # Jobs: given to all ants at once, every allocation_period, see assign_jobs.
+        # Ants getting a job wake up
+        self.allocation_period = 5  # Virtual seconds
+        self.allocation_timer = scheduler.every(self.allocation_period, self.allocate_jobs, first=scheduler.now)
+        self.job_hysteresis = 0.05  # Need margin below threshold before an ant quits its job
+        self.job_counts = {job: 0 for job in Job}  # As of last allocation
+        self.nap_duration = 10  # Virtual seconds
 
     def populate(self, n_ants: int) -> None:
         newborns = [Ant(self) for _ in range(n_ants)]
         self.population.extend(newborns)
     
-    def give_job(self, ant: 'Ant'):
-        if self.needs[ColonyNeed.GETFOOD] >= ant.colony_needs_thresholds[ColonyNeed.GETFOOD]:
-            return Job.FORAGING
-        return Job.JOBLESS
+    def allocate_jobs(self) -> None:
+        """Gives jobs to all ants according to needs, see assign_jobs"""
+        population, n = self.population, len(self.population)
+        job = np.fromiter((JOB_CODE[ant.job] for ant in population), dtype=np.int8, count=n)
+        thresholds = np.array([ant.thresholds for ant in population], dtype=float).reshape(n, len(NEEDS))
+        changed = assign_jobs(job, thresholds, self.needs, self.job_hysteresis)
+        for i in changed.tolist():
+            ant = population[i]
+            ant.job = JOBS[job[i]]
+            if ant.wake_timer is not None:
+                ant.wake()
+        self.jobs_allocated(job, len(changed))
+
+    def jobs_allocated(self, codes: np.ndarray, n_changed: int) -> None:
+        """Updates job_counts from job codes of all ants, and tells it"""
+        self.job_counts = {job: int(np.count_nonzero(codes == code)) for job, code in JOB_CODE.items()}
+        self.world.tau.events.emit(EventKind.JOBS_ALLOCATED, n_changed, self.job_counts)
+    
+    def count_jobs(self) -> dict['Job', int]:
+        counts = {job: 0 for job in Job}
+        for ant in self.population:
+            counts[ant.job] += 1
+        return counts
+    
+    def positions(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns x, y and orientation of all ants as arrays"""
+        xyo = np.array([(ant.x, ant.y, ant.o) for ant in self.population], dtype=float).reshape(-1, 3)
+        return xyo[:, 0], xyo[:, 1], xyo[:, 2]
+
+    def trails(self) -> np.ndarray:
+        """Returns the virtual seconds each ant has left marking its way"""
+        return np.fromiter((ant.trail for ant in self.population), dtype=float, count=len(self.population))
+
+    def columns(self, names: tuple[str, ...] | None=None) -> dict[str, np.ndarray]:
+        """Returns ant attributes as arrays, one row per ant, e.g. to save the game.
+        names: columns wanted, all if not given. Only those are built
+        job holds indices in JOBS, speed_factor_h is oldest first,
+        wake is the scheduler time sleeping ants wake up at, in the past for ants awake"""
+        population, n = self.population, len(self.population)
+        builders = {
+            'idno': lambda: np.fromiter((ant.idno for ant in population), dtype=np.int64, count=n),
+            'x': None,  # See positions below
+            'y': None,
+            'o': None,
+            'speed_factor_h': lambda: np.array(
+                [ant.speed_factor_h[ant.speed_factor_idx:] + ant.speed_factor_h[:ant.speed_factor_idx]
+                 for ant in population],
+                dtype=float
+            ).reshape(n, Ant.speed_history),
+            'job': lambda: np.fromiter((JOB_CODE[ant.job] for ant in population), dtype=np.int8, count=n),
+            'thresholds': lambda: np.array([ant.thresholds for ant in population], dtype=float).reshape(n, len(NEEDS)),
+            'trail': self.trails,
+            'wake': lambda: np.fromiter(
+                (ant.wake_timer.due if ant.wake_timer is not None else 0 for ant in population), dtype=float, count=n
+            ),
+        }
+        names = names or tuple(builders)
+        columns = {}
+        if {'x', 'y', 'o'} & set(names):
+            columns['x'], columns['y'], columns['o'] = self.positions()
+        return {name: columns[name] if name in columns else builders[name]() for name in names}
+
+    def living_order(self) -> list[int]:
+        """Rows of ants in the order they live, which decides who draws which random numbers:
+        awake ants as in World.living_objects, then sleeping ants by wake-up"""
+        rows = {ant: i for i, ant in enumerate(self.population)}
+        awake = [rows[obj] for obj in self.world.living_objects if obj in rows]
+        sleeping = sorted(
+            (ant.wake_timer.entry[:2], i) for i, ant in enumerate(self.population) if ant.wake_timer is not None
+        )
+        return awake + [i for _, i in sleeping]
+
+    def attach(self, columns: dict[str, np.ndarray], living_order: list[int] | None=None) -> None:
+        """Gives the colony ants whose attributes are columns as returned by columns(),
+        living in living_order if given. The colony must have no ant yet"""
+        self.population = [
+            Ant.restore(self, idno, x, y, o, speed_factor_h, JOBS[job], tuple(thresholds), trail)
+            for idno, x, y, o, speed_factor_h, job, thresholds, trail in zip(*(
+                columns[name].tolist()
+                for name in ('idno', 'x', 'y', 'o', 'speed_factor_h', 'job', 'thresholds', 'trail')
+            ))
+        ]
+        wake = columns['wake'].tolist()
+        now = self.world.tau.scheduler.now
+        for i in living_order if living_order is not None else range(len(self.population)):
+            if wake[i] > now:
+                self.population[i].sleep_until(wake[i])
+            else:
+                self.world.add_life(self.population[i])
     
     def ant_birth(self) -> tuple[int, Position, 'Job']:
         self.ant_idno += 1
@@ -150,13 +276,28 @@ class Colony():
         job = Job.JOBLESS
         return idno, position, job
     
-    def live(self):
+    def trail_after(self, food: 'Food') -> float:
+        """Virtual seconds of trail to lay for the ant that just ate food, once removed from the world:
+        none if no other food is in sight, the trail would lead to nothing"""
+        if not self.follow_trails:
+            return 0
+        world = self.world
+        if world.food_index.nearest_one(food.position.x, food.position.y, world.food_sense_radius) is None:
+            return 0
+        return self.trail_duration
+
+    def trail_deposit(self, trail: float | np.ndarray, dt: float) -> float | np.ndarray:
+        """Pheromone laid over dt by ants with trail virtual seconds left, less as they go"""
+        return self.trail_strength*dt*trail/self.trail_duration
+
+    def upkeep(self, dt: float):
+        """Called every dt virtual seconds by the scheduler"""
         # Colony looses 1 food unit per minute
-        stockfood_decr = - (1/60) * self.world.tau.vt_loop_duration
+        stockfood_decr = - (1/60) * dt
         self.stock_food = max(0, self.stock_food + stockfood_decr)
 
         # Need to collect food increases by +0.1/min if stock of food below 5
-        needgetfood_incr = 0 if self.stock_food>=5 else (0.1/60)*self.world.tau.vt_loop_duration
+        needgetfood_incr = 0 if self.stock_food>=5 else (0.1/60)*dt
         self.needs[ColonyNeed.GETFOOD] = min(1, self.needs[ColonyNeed.GETFOOD]+needgetfood_incr)
 
         # logging.info(f'Colony has {self.stock_food:.2f} food with a need of {self.needs[ColonyNeed.GETFOOD]:.2f}')
@@ -170,94 +311,164 @@ class ColonyNeed(Enum):
     GETFOOD = 'Collect food'
 
 
+JOBS = tuple(Job)
+NEEDS = tuple(ColonyNeed)
+NEED_COL = {need: col for col, need in enumerate(NEEDS)}  # Column of a need in ant thresholds
+JOB_CODE = {job: code for code, job in enumerate(JOBS)}  # Code of a job in job arrays
+NEED_JOB = {ColonyNeed.GETFOOD: Job.FORAGING}  # Job meeting a need
+SPEED_HISTORY = 2  # Previous speed factors an ant averages with the new one, in every engine
+
+
+def assign_jobs(job: np.ndarray, thresholds: np.ndarray, needs: dict[ColonyNeed, float],
+                hysteresis: float) -> np.ndarray:
+    """Gives each ant the job of the need most above its threshold, JOBLESS if none is.
+    An ant keeps its job until the need falls hysteresis below its threshold.
+    job: codes in JOBS, updated in place. thresholds: one row per ant, one column per need.
+    Returns indices of ants whose job changed"""
+    # Arithmetic rather than masked writes, which are slow on random masks: 1M ants take milliseconds
+    new_job = np.full(len(job), JOB_CODE[Job.JOBLESS], dtype=job.dtype)
+    best = np.zeros(len(job))  # Margin of the need chosen so far
+    for need, col in NEED_COL.items():
+        code = JOB_CODE[NEED_JOB[need]]
+        margin = needs[need] - thresholds[:, col] + hysteresis*(job == code)
+        new_job += (margin >= best) * (code - new_job)
+        np.maximum(best, margin, out=best)
+    changed = np.flatnonzero(new_job != job)
+    job[...] = new_job
+    return changed
+
+
 class Ant():
     """Defines ants"""
+    __slots__ = (
+        'colony', 'world', 'thresholds', 'idno', 'position', 'job', 'speed_factor_h', 'speed_factor_idx', 'trail',
+        'wake_timer'
+    )
+
+    # Properties
+    max_pace = 100  # In game-length-units per second
+    speed_history = SPEED_HISTORY
+
     def __init__(self, colony: Colony) -> None:
         self.colony = colony
         self.world = self.colony.nest.world
         
         # Properties
-        self.max_pace = 100  # In game-length-units per second
-        self.colony_needs_thresholds = { need: random.uniform(0.1, 0.5) for need in ColonyNeed }
+        self.thresholds = tuple(self.colony.rng.uniform(0.1, 0.5) for _ in NEEDS)  # By need, see NEED_COL
 
         # Status
         self.idno, self.position, self.job = self.colony.ant_birth()
-        self.speed_factor_h = [0, 0]
+        self.speed_factor_h = [0] * self.speed_history  # Ring buffer, next slot to write is speed_factor_idx
+        self.speed_factor_idx = 0
+        self.trail = 0  # Virtual seconds left marking the way with pheromones
+        self.wake_timer = None  # Set while sleeping
 
         self.world.add_life(self)  # Allow the ant to be alive
-        logging.info(f'Ant #{self.idno} born @({self.x:.0f}, {self.y:.0f}), {self.job.value}. '
-                     f'Foraging threshold = {self.colony_needs_thresholds[ColonyNeed.GETFOOD]:.2f}')
+        self.world.tau.events.emit(EventKind.BIRTH, self.idno, 1)
+
+    @classmethod
+    def restore(cls, colony: Colony, idno: int, x: float, y: float, o: float,
+                speed_factor_h: list[float], job: 'Job', thresholds: tuple[float, ...], trail: float) -> 'Ant':
+        """Brings back a saved ant, without birth. It does not live until added to the World or put to sleep"""
+        ant = cls.__new__(cls)
+        ant.colony = colony
+        ant.world = colony.nest.world
+        ant.thresholds = thresholds
+        ant.idno = idno
+        ant.position = Position(x, y, o)
+        ant.job = job
+        ant.speed_factor_h = list(speed_factor_h)
+        ant.speed_factor_idx = 0
+        ant.trail = trail
+        ant.wake_timer = None
+        return ant
     
     def live(self) -> None:
         """Called frequently by Tau"""
-        if self.job == Job.FORAGING:
-            new_pos, speed_factor = self.gen_random_movement()
-            new_pos_acceptable, closest_pos = self.world.validate_position(new_pos)
-            if not new_pos_acceptable:
-                new_pos = closest_pos
-                speed_factor = 0
-            self.speed_factor_h.append(speed_factor)
-            self.speed_factor_h.pop(0)
-            self.change_position(new_pos)
-
-        elif self.job == Job.JOBLESS:
-            new_pos, speed_factor = self.gen_random_movement()
-            new_pos_acceptable, closest_pos = self.world.validate_position(new_pos)
-            if not new_pos_acceptable:
-                new_pos = closest_pos
-                speed_factor = 0
-            
+        new_x, new_y, new_o, speed_factor = self.gen_random_movement()
+        new_x, new_y, new_pos_acceptable = self.world.clamp(new_x, new_y)
+        if not new_pos_acceptable:
+            speed_factor = 0
+
+        if self.job == Job.JOBLESS:
             # If ants goes away from nest, slow her down to bring them back
-            curr_pos_dist = self.position.distance_from(self.colony.nest)
-            new_pos_dist = new_pos.distance_from(self.colony.nest)
-            if (new_pos_dist > 0.9*curr_pos_dist) and (curr_pos_dist >= self.colony.nest.attraction_radius):
-                newpos_rel_dist = new_pos_dist / self.colony.nest.attraction_radius
+            nest = self.colony.nest
+            curr_pos_dist = math.hypot(self.position.x-nest.x, self.position.y-nest.y)
+            new_pos_dist = math.hypot(new_x-nest.x, new_y-nest.y)
+            if (new_pos_dist > 0.9*curr_pos_dist) and (curr_pos_dist >= nest.attraction_radius):
+                newpos_rel_dist = new_pos_dist / nest.attraction_radius
                 attraction_factor = newpos_rel_dist**1.5
-                new_x = (new_pos.x + self.position.x*attraction_factor)/(1+attraction_factor)
-                new_y = (new_pos.y + self.position.y*attraction_factor)/(1+attraction_factor)
-                new_o = new_pos.o + random.gauss(0, 0.5)*math.pi/6
-                new_pos = Position(new_x, new_y, new_o)
-            self.speed_factor_h.append(speed_factor)
-            self.speed_factor_h.pop(0)
-            self.change_position(new_pos)
-
-    def change_position(self, new_pos: Position) -> None:
-        self.position.x = new_pos.x
-        self.position.y = new_pos.y
-        self.position.o = new_pos.o
+                new_x = (new_x + self.position.x*attraction_factor)/(1+attraction_factor)
+                new_y = (new_y + self.position.y*attraction_factor)/(1+attraction_factor)
+                new_o = new_o + self.colony.ants_rng.gauss(0, 0.5)*math.pi/6
+        elif self.job == Job.FORAGING:
+            # Head for food in sight, or else follow trails
+            max_turn = self.colony.max_steering*self.world.tau.vt_loop_duration
+            food = self.world.food_index.nearest_one(new_x, new_y, self.world.food_sense_radius)
+            if food is not None:
+                _, food_x, food_y = food
+                heading = math.atan2(new_y-food_y, new_x-food_x)  # Ants move towards -(cos(o), sin(o))
+                turn = (heading - new_o + math.pi) % (2*math.pi) - math.pi
+                new_o = new_o + min(max(turn, -max_turn), max_turn)
+            elif self.colony.follow_trails:
+                new_o = self.world.pheromones.steer_one(new_x, new_y, new_o, max_turn)
+
+        self.speed_factor_h[self.speed_factor_idx] = speed_factor
+        self.speed_factor_idx = (self.speed_factor_idx + 1) % self.speed_history
+        self.change_position(new_x, new_y, new_o)
+
+        if self.trail > 0:
+            dt = self.world.tau.vt_loop_duration
+            amount = self.colony.trail_deposit(self.trail, dt)
+            self.world.pheromones.deposit_one(self.position.x, self.position.y, amount)
+            self.trail -= dt
+
+        nest = self.colony.nest
+        if self.job == Job.JOBLESS and math.hypot(self.position.x-nest.x, self.position.y-nest.y) < nest.rest_radius:
+            self.sleep_until(self.world.tau.scheduler.now + self.colony.nap_duration)
+
+    def sleep_until(self, vt: float) -> None:
+        """Stops living until virtual second vt of the scheduler, or until woken up"""
+        self.world.remove_life(self)
+        self.wake_timer = self.world.tau.scheduler.at(vt, self.wake)
+
+    def wake(self) -> None:
+        self.world.tau.scheduler.cancel(self.wake_timer)
+        self.wake_timer = None
+        self.world.add_life(self)
+
+    def change_position(self, x: float, y: float, o: float) -> None:
+        self.position.move_to(x, y, o)
         self.react_to_position()
     
     def react_to_position(self):
-        for nlo in self.world.nonliving_objects:
-            if self.position.distance_from(nlo.position) < 10:
-
-                if isinstance(nlo, Nest):
-                    # logging.info(f'Ant {object.idno} near nest. Get food: {object.colony.needs[ColonyNeed.GETFOOD]:.2f}/{object.colony_needs_thresholds[ColonyNeed.GETFOOD]:.2f}')
-                    new_job = self.colony.give_job(self)
-                    if new_job != self.job:
-                        self.job = Job.FORAGING
-                        logging.info(f'Ant {self.idno} has new job {self.job.value}')
-                elif isinstance(nlo, Food):
-                    logging.info(f'Ant {self.idno} found food')
-                    self.world.nonliving_objects.remove(nlo)
-                    del nlo
-
-    def gen_random_movement(self) -> Position:
+        for nlo in self.world.objects_near(self.position, self.world.contact_radius):
+            if isinstance(nlo, Food):
+                self.world.tau.events.emit(EventKind.FOOD_FOUND, self.idno, nlo.position.x, nlo.position.y)
+                self.world.remove_object(nlo)
+                self.trail = self.colony.trail_after(nlo)
+
+    def gen_random_movement(self) -> tuple[float, float, float, float]:
+        """Returns new x, y, orientation and speed factor, without moving the ant"""
         # First go straight, then turn
-        new_speed_factor = random.random()
-        new_speed_factor_h = self.speed_factor_h + [new_speed_factor]
-        speed_factor = sum(new_speed_factor_h) / 3
+        new_speed_factor = self.colony.ants_rng.random()
+        speed_factor = (sum(self.speed_factor_h) + new_speed_factor) / (self.speed_history+1)
         max_distance = self.max_pace*self.world.tau.vt_loop_duration
 
-        move_x = -round(max_distance*speed_factor*math.cos(self.o))
-        move_y = -round(max_distance*speed_factor*math.sin(self.o))
-        new_x = self.x + move_x
-        new_y = self.y + move_y
+        position = self.position
+        move_x = -round(max_distance*speed_factor*math.cos(position.o))
+        move_y = -round(max_distance*speed_factor*math.sin(position.o))
+        new_x = position.x + move_x
+        new_y = position.y + move_y
 
-        rotation_angle = random.gauss(sigma=6)*self.world.tau.vt_loop_duration
+        rotation_angle = 6*self.colony.ants_rng.standard_normal()*self.world.tau.vt_loop_duration
         rotation = max(0, 1-speed_factor*2) * rotation_angle  # The more speed, the less turning
-        new_o = (self.o + rotation * math.pi)
-        return Position(new_x, new_y, new_o), speed_factor
+        new_o = (position.o + rotation * math.pi)
+        return new_x, new_y, new_o, speed_factor
+
+    @property
+    def colony_needs_thresholds(self) -> dict['ColonyNeed', float]:
+        return {need: self.thresholds[col] for need, col in NEED_COL.items()}
 
     @property
     def x(self):
@@ -274,16 +485,28 @@ class Ant():
 
 class Resource():
     """Defines a resource"""
-    pass
+    __slots__ = ()
 
 
 class Food(Resource):
     """Defines food"""
+    __slots__ = ('position',)
+
     def __init__(self, pos: Position):
         self.position = pos
-        self.draw = partial(draw_food, x=self.position.x, y=self.position.y)
 
 
 class ConstructionMaterial(Resource):
     """Defines construction materials"""
-    pass
+    __slots__ = ()
+
+
+def create_game(tau: Tau, px_size: tuple[int, int], n_ants: int, colony_cls=Colony,
+                size: tuple[int, int] | None=None) -> tuple[World, Nest, Colony]:
+    """Wires a new World, its Nest and a populated Colony to the time engine"""
+    world = World(tau=tau, px_size=px_size, size=size)
+    nest = Nest(world)
+    colony = colony_cls(nest)
+    colony.populate(n_ants)
+    tau.add_world(world)
+    return world, nest, colony
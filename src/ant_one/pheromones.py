@@ -0,0 +1,104 @@
+"""
+Pheromones are the chemical trails ants of Ant One leave and follow.
+Its purpose is to:
+- Hold concentrations in a grid whose resolution does not depend on World.size
+- Take deposits of many ants in one batch
+- Evaporate and diffuse the whole grid at once, at its own period on the scheduler, whatever the number of ants
+- Give the gradient at many positions at once, so that foragers can follow trails
+"""
+
+import math
+
+import numpy as np
+
+
+class PheromoneField():
+    """Pheromone concentrations over the World.
+    resolution: number of columns and rows of the grid
+    evaporation: rate of concentration loss, per virtual second
+    diffusion: rate at which cells even out with their neighbours, per virtual second
+    period: virtual seconds between two updates of the grid"""
+    def __init__(self, world, resolution: tuple[int, int]=(100, 60), evaporation: float=0.05,
+                 diffusion: float=0.5, period: float=0.25) -> None:
+        self.world = world
+        self.evaporation = evaporation
+        self.diffusion = diffusion
+        self.period = period
+        self.timer = world.tau.scheduler.every(period, self.update, period)
+        self.min_gradient = 1e-3  # Below, there is no trail to follow
+
+        self.grid = np.zeros((resolution[1], resolution[0]))  # Rows are y
+        self.deposits = np.zeros_like(self.grid)  # Since last update
+        self.update_gradient()
+
+    def cells(self, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Rows and columns of the cells holding positions"""
+        rows, cols = self.grid.shape
+        row = np.clip((y * (rows/self.world.size[1])).astype(np.intp), 0, rows-1)
+        col = np.clip((x * (cols/self.world.size[0])).astype(np.intp), 0, cols-1)
+        return row, col
+
+    def cell(self, x: float, y: float) -> tuple[int, int]:
+        """Scalar cells()"""
+        rows, cols = self.grid.shape
+        return (
+            min(max(int(y * (rows/self.world.size[1])), 0), rows-1),
+            min(max(int(x * (cols/self.world.size[0])), 0), cols-1)
+        )
+
+    def deposit(self, x: np.ndarray, y: np.ndarray, amount: float | np.ndarray) -> None:
+        """Adds amount of pheromone at each position, effective at next update"""
+        row, col = self.cells(x, y)
+        self.deposits += np.bincount(
+            row*self.grid.shape[1] + col,
+            weights=np.broadcast_to(amount, row.shape),
+            minlength=self.grid.size
+        ).reshape(self.grid.shape)
+
+    def deposit_one(self, x: float, y: float, amount: float) -> None:
+        self.deposits[self.cell(x, y)] += amount
+
+    def update(self, dt: float) -> None:
+        """Adds deposits, then diffuses and evaporates the grid over dt virtual seconds"""
+        grid = self.grid
+        grid += self.deposits
+        self.deposits[...] = 0
+
+        # Each cell moves towards the mean of its 4 neighbours, borders reflect
+        padded = np.pad(grid, 1, mode='edge')
+        neighbours = (padded[:-2, 1:-1] + padded[2:, 1:-1] + padded[1:-1, :-2] + padded[1:-1, 2:]) / 4
+        grid += min(1, self.diffusion*dt) * (neighbours - grid)
+        grid *= math.exp(-self.evaporation*dt)
+        self.update_gradient()
+
+    def update_gradient(self) -> None:
+        self.gradient_y, self.gradient_x = np.gradient(self.grid)  # Per cell
+        # Per cell rather than per ant: orientation up the gradient, see steer()
+        self.heading = np.arctan2(-self.gradient_y, -self.gradient_x)
+        self.marked = np.hypot(self.gradient_x, self.gradient_y) >= self.min_gradient
+
+    def sample(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        return self.grid[self.cells(x, y)]
+
+    def gradient(self, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        cells = self.cells(x, y)
+        return self.gradient_x[cells], self.gradient_y[cells]
+
+    def steer(self, x: np.ndarray, y: np.ndarray, o: np.ndarray, max_turn: float) -> np.ndarray:
+        """Orientations o turned by at most max_turn radians up the gradient.
+        Ants move towards -(cos(o), sin(o)), see Ant.gen_random_movement"""
+        row, col = self.cells(x, y)
+        cells = row*self.grid.shape[1] + col
+        turn = self.heading.take(cells) - o
+        turn -= 2*math.pi*np.round(turn/(2*math.pi))  # Shortest way, in [-pi, pi]
+        np.clip(turn, -max_turn, max_turn, out=turn)
+        turn[~self.marked.take(cells)] = 0
+        return o + turn
+
+    def steer_one(self, x: float, y: float, o: float, max_turn: float) -> float:
+        """Scalar steer()"""
+        cell = self.cell(x, y)
+        if not self.marked[cell]:
+            return o
+        turn = (float(self.heading[cell]) - o + math.pi) % (2*math.pi) - math.pi
+        return o + min(max(turn, -max_turn), max_turn)
@@ -1,11 +1,15 @@
 
+import asyncio
+import datetime
 import logging
+
 import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 
-from .game_resources import World, Ant, Colony, Nest, Food, ConstructionMaterial
-from .drawings import draw_nest_entrance, draw_mini_ant
+from .game_resources import create_game
+from .raster import MODES, RasterRenderer
+from .renderer import CanvasRenderer
 
 
 class PlayScreen(toga.Box):
@@ -14,48 +18,101 @@ class PlayScreen(toga.Box):
         self.settings = settings
         self.game_controls = game_controls
         self.tau = tau
+        self.world_scale = 2  # World size in canvas sizes, explored with the camera
+        self.drag_from = None  # Last pointer position while panning or zooming
         self.build_interface()
         logging.info('Built interface of play screen')
 
     def initialize_game_engine(self):
-        self.world = World(
+        px_size = (self.canvas.layout.width, self.canvas.layout.height)
+        self.world, self.nest, self.colony = create_game(
             tau=self.tau,
-            px_size=(
-                self.canvas.layout.width,
-                self.canvas.layout.height
-            )
+            px_size=px_size,
+            n_ants=10,
+            size=(px_size[0]*self.world_scale, px_size[1]*self.world_scale)
         )
-        self.nest = Nest(self.world)
-        self.colony = Colony(self.nest)
-        self.colony.populate(10)
-        
-        self.tau.add_world(self.world)
+        self.renderer = CanvasRenderer(self.canvas, self.world, self.colony, self.settings)
+        self.raster_renderer = None  # Built when first switched to
+        self.active_renderer = self.renderer
         self.tau.add_render(self.render)
         logging.info('Game initialised')
 
     def render(self):
-        context = self.canvas.context
-        context.clear()
-        
-        for object in self.world.nonliving_objects:
-            object.draw(context, self.world.to_px)
-
-        for ant in self.colony.population:
-            draw_mini_ant(context, self.world.to_px, ant.x, ant.y, ant.o)
+        self.active_renderer.render()
         
         # Update top bar
         self.top_bar_infos[0].text = f'{self.tau.loopno:04}  |  {self.tau.game_duration:.2f}s'
         self.top_bar_infos[1].text = f'Day {self.tau.vtime:%d %H:%M:%S}'
-        self.top_bar_infos[2].text = f'{len(self.colony.population)} ants'
-        self.top_bar_infos[4].text = f'{1/self.tau.rt_loop_duration.total_seconds():.0f} fps'
+        jobs = ', '.join(f'{count} {job.value.lower()}' for job, count in self.colony.job_counts.items())
+        self.top_bar_infos[2].text = f'{len(self.colony.population)} ants ({jobs})'
+        self.top_bar_infos[3].text = f'{self.tau.rt_render_duration*1000:.0f} ms/frame'
+        self.top_bar_infos[4].text = f'{1/self.tau.rt_frame_duration:.0f} fps'
 
     # Event handlers
     def on_press_canvas(self, widget, x, y):
         logging.info(f'Canvas pressed @ {x} x {y}')
+        self.drag_from = (x, y)
+
+    def on_drag_canvas(self, widget, x, y):
+        """Pans the camera"""
+        if self.drag_from is not None:
+            self.renderer.camera.pan(x-self.drag_from[0], y-self.drag_from[1])
+        self.drag_from = (x, y)
+
+    def on_alt_drag_canvas(self, widget, x, y):
+        """Zooms around the point first pressed: drag up to zoom in. Toga canvases have no scroll event"""
+        if self.drag_from is not None:
+            self.renderer.camera.zoom_at(2**((self.drag_from[1]-y)/100), *self.zoom_center)
+        self.drag_from = (x, y)
+
+    def on_alt_press_canvas(self, widget, x, y):
+        self.drag_from = self.zoom_center = (x, y)
+
+    def on_release_canvas(self, widget, x, y):
+        self.drag_from = None
+
+    def on_press_zoom(self, widget):
+        camera = self.renderer.camera
+        camera.zoom_at(1.25 if widget.text == '+' else 0.8, camera.view_px[0]/2, camera.view_px[1]/2)
     
+    def on_change_raster(self, widget):
+        """Swaps the canvas for an image painted by the raster renderer, or back.
+        Both renderers share the camera, image views have no pointer events: zoom with buttons"""
+        if widget.value:
+            if self.raster_renderer is None:
+                self.raster_renderer = RasterRenderer(
+                    self.image_view, self.world, self.colony,
+                    camera=self.renderer.camera, mode=self.raster_mode_selection.value
+                )
+            self.view_box.replace(self.canvas, self.image_view)
+            self.active_renderer = self.raster_renderer
+        else:
+            self.view_box.replace(self.image_view, self.canvas)
+            self.active_renderer = self.renderer
+        self.raster_mode_selection.enabled = widget.value
+        logging.info(f'Rendering with {type(self.active_renderer).__name__}')
+
+    def on_change_raster_mode(self, widget):
+        if self.raster_renderer is not None:
+            self.raster_renderer.mode = widget.value
+
     def goto_pimp(self, widget):
         self.game_controls('go to pimp')
     
+    def on_press_fastforward(self, widget):
+        self.fastforward_btn.enabled = False
+        self.fastforward_progress.value = 0
+        asyncio.ensure_future(self.fastforward())
+
+    async def fastforward(self):
+        def on_progress(done):
+            self.fastforward_progress.value = done
+        try:
+            await self.tau.advance(datetime.timedelta(hours=6), on_progress=on_progress)
+        finally:
+            self.fastforward_btn.enabled = True
+            self.render()
+
     def on_change_speedoftime(self, widget):
         new_speedoftime = self.tau.speeds_of_time[int(widget.value)]
         self.tau.time_factor = new_speedoftime
@@ -71,7 +128,13 @@ class PlayScreen(toga.Box):
         self.canvas = toga.Canvas(
             style=Pack(padding=10, flex=15, background_color='#E9F0CF'),
             on_press=self.on_press_canvas,
+            on_drag=self.on_drag_canvas,
+            on_release=self.on_release_canvas,
+            on_alt_press=self.on_alt_press_canvas,
+            on_alt_drag=self.on_alt_drag_canvas,
+            on_alt_release=self.on_release_canvas,
         )
+        self.image_view = toga.ImageView(style=Pack(padding=10, flex=15))  # Shown by the raster renderer
 
         # Side pane
         self.time_control_lbl = toga.Label('Time control', style=Pack(padding=15))
@@ -90,10 +153,34 @@ class PlayScreen(toga.Box):
             ],
             style=Pack(direction=ROW, flex=1, padding=(0, 0, 10, 0))
         )
+        self.fastforward_btn = toga.Button(
+            'Skip 6 hours', on_press=self.on_press_fastforward, style=Pack(padding=(0, 5))
+        )
+        self.fastforward_progress = toga.ProgressBar(max=1, value=0, style=Pack(padding=(5, 5)))
         time_control_block = toga.Box(
-            children=[self.time_control_lbl, time_slider, time_slider_labels],
+            children=[
+                self.time_control_lbl, time_slider, time_slider_labels,
+                self.fastforward_btn, self.fastforward_progress
+            ],
             style=Pack(direction=COLUMN, flex=6)
         )
+        zoom_block = toga.Box(
+            children=[
+                toga.Button('-', on_press=self.on_press_zoom, style=Pack(flex=1, padding=5)),
+                toga.Button('+', on_press=self.on_press_zoom, style=Pack(flex=1, padding=5)),
+            ],
+            style=Pack(direction=ROW)
+        )
+        self.raster_mode_selection = toga.Selection(
+            items=list(MODES), on_change=self.on_change_raster_mode, enabled=False, style=Pack(padding=5)
+        )
+        render_block = toga.Box(
+            children=[
+                toga.Switch('Raster rendering', on_change=self.on_change_raster, style=Pack(padding=5)),
+                self.raster_mode_selection
+            ],
+            style=Pack(direction=COLUMN)
+        )
         config_block = toga.Box(
             children=[toga.Button('Pimp '+self.settings.name, on_press=self.goto_pimp)],
             style=Pack(direction=COLUMN, flex=3)
@@ -101,6 +188,8 @@ class PlayScreen(toga.Box):
         side_pane = toga.Box(
             children=[
                 toga.Box(style=Pack(flex=1)),
+                zoom_block,
+                render_block,
                 toga.Divider(),
                 time_control_block,
                 toga.Divider(),
@@ -110,13 +199,11 @@ class PlayScreen(toga.Box):
         )
 
         # Layout assembly
+        self.view_box = toga.Box(children=[top_bar, self.canvas], style=Pack(direction=COLUMN, flex=3))
         main_box = toga.Box(
             style=Pack(direction=ROW, flex=1),
             children=[
-                toga.Box(
-                    children=[top_bar, self.canvas],
-                    style=Pack(direction=COLUMN, flex=3)
-                ),
+                self.view_box,
                 side_pane
             ]
         )
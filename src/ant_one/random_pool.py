@@ -0,0 +1,82 @@
+"""
+Random pools feed Ant One's per-ant draws.
+Their purpose is to:
+- Generate random numbers in large NumPy blocks, refilled in bulk
+- Hand them out one at a time for a cost close to a C call, with the methods of random.Random the game uses
+- Keep a state that can be saved and restored, so that a run can be replayed from its seed
+
+Tau creates them: tau.random_stream(name).
+"""
+
+import itertools
+import operator
+from functools import partial
+
+import numpy as np
+
+
+# Kinds of blocks: name -> draw of a block from a numpy Generator
+DRAWS = {
+    'uniform': lambda generator, size: generator.random(size),  # [0, 1)
+    'normal': lambda generator, size: generator.standard_normal(size),
+}
+
+
+class RandomPool():
+    """Stream of random numbers drawn from pre-generated blocks.
+    seed: root of the generators, one per kind of block so that kinds are consumed independently
+    block_size: numbers generated at once, by kind"""
+    def __init__(self, seed: np.random.SeedSequence, block_size: int=4096) -> None:
+        self.block_size = block_size
+        self.generators = {
+            kind: np.random.default_rng(child_seed) for kind, child_seed in zip(DRAWS, seed.spawn(len(DRAWS)))
+        }
+        self.block_states = {}  # By kind, generator state before the block in use
+        self.blocks = {}  # By kind, iterator over the block in use
+        self.start()
+
+    def start(self, used: dict[str, int] | None=None) -> None:
+        """(Re)starts streams at the current state of generators, skipping used numbers of first blocks"""
+        streams = {}
+        for kind in DRAWS:
+            first_block = self.new_block(kind)
+            skip = (used or {}).get(kind, 0)
+            next(itertools.islice(first_block, skip, skip), None)
+            streams[kind] = itertools.chain(
+                first_block, itertools.chain.from_iterable(iter(partial(self.new_block, kind), None))
+            )
+        # Bound C methods: no Python frame per number
+        self.random = streams['uniform'].__next__
+        self.standard_normal = streams['normal'].__next__
+
+    def new_block(self, kind: str):
+        generator = self.generators[kind]
+        self.block_states[kind] = generator.bit_generator.state
+        self.blocks[kind] = iter(DRAWS[kind](generator, self.block_size).tolist())
+        return self.blocks[kind]
+
+    def gauss(self, mu: float=0.0, sigma: float=1.0) -> float:
+        return mu + sigma*self.standard_normal()
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b-a)*self.random()
+
+    def randint(self, a: int, b: int) -> int:
+        """Integer in [a, b], both included"""
+        return a + int(self.random()*(b-a+1))
+
+    def getstate(self) -> dict:
+        """JSON-friendly state: by kind, the state of the generator before the block in use,
+        and how many numbers of that block were used"""
+        return {
+            kind: {
+                'generator': self.block_states[kind],
+                'used': self.block_size - operator.length_hint(self.blocks[kind]),
+            }
+            for kind in DRAWS
+        }
+
+    def setstate(self, state: dict) -> None:
+        for kind in DRAWS:
+            self.generators[kind].bit_generator.state = state[kind]['generator']
+        self.start(used={kind: state[kind]['used'] for kind in DRAWS})
@@ -0,0 +1,145 @@
+"""
+Raster renderer of the play screen, an alternative to the canvas renderer.
+Instead of sending drawing commands to a toga Canvas, it paints pixels in an
+offscreen NumPy buffer, then shows the buffer as one image per frame.
+- Background: ground, nest and food, painted once and cached until World.nonliving_objects
+  or the camera changes
+- Ants: stamped as small sprites, all ants at once with fancy indexing
+Modes, switchable at any time:
+- 'dirty': only pixels where ants were stamped last frame are restored from the background,
+  unless ants covered much of the frame
+- 'full': the whole background is copied every frame
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+from .camera import Camera
+from .drawings import MINI_ANT_BODY_COLOR, MINI_ANT_CONTOUR_COLOR
+from .game_resources import Colony, Food, Nest, World
+
+
+BACKGROUND_COLOR = '#E9F0CF'
+NEST_COLOR = '#FFA500'  # orange
+FOOD_COLOR = '#0000FF'  # blue
+MODES = ('dirty', 'full')
+
+
+def rgba(color: str) -> np.uint32:
+    """'#RRGGBB' as an opaque pixel: bytes R, G, B, A in memory"""
+    r, g, b = (int(color[i:i+2], 16) for i in (1, 3, 5))
+    return np.array([r, g, b, 255], dtype=np.uint8).view(np.uint32)[0]
+
+
+def disc_offsets(radius: float) -> tuple[np.ndarray, np.ndarray]:
+    """Row and column offsets of the pixels of a disc centered on 0"""
+    reach = int(radius)
+    dy, dx = np.mgrid[-reach:reach+1, -reach:reach+1]
+    inside = dx**2 + dy**2 <= radius**2
+    return dy[inside], dx[inside]
+
+
+def encode_png(pixels: np.ndarray, level: int=1) -> bytes:
+    """Minimal PNG of an (height, width, 3 or 4) uint8 array of RGB or RGBA pixels.
+    Low zlib levels favour speed"""
+    height, width, channels = pixels.shape
+    rows = np.zeros((height, 1 + width*channels), dtype=np.uint8)  # First byte of a row: filter type 0
+    rows[:, 1:] = pixels.reshape(height, width*channels)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, {3: 2, 4: 6}[channels], 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(rows.tobytes(), level))
+        + chunk(b'IEND', b'')
+    )
+
+
+class RasterRenderer():
+    """Draws a World and its Colony in a pixel buffer shown by a toga ImageView
+    camera: shared with another renderer to keep the view when switching, new if not given
+    mode: see MODES"""
+    def __init__(self, image_view, world: World, colony: Colony, camera: Camera | None=None,
+                 mode: str='dirty') -> None:
+        self.image_view = image_view
+        self.world = world
+        self.colony = colony
+        self.camera = camera or Camera(world.size, world.px_size)
+        self.mode = mode
+        self.food_radius = 5  # In pixels
+        # One sprite for contour and body, so that each pixel is written once
+        self.ant_sprite = disc_offsets(3)
+        dy, dx = self.ant_sprite
+        self.ant_colors = np.where(
+            dx**2 + dy**2 <= 2**2, rgba(MINI_ANT_BODY_COLOR), rgba(MINI_ANT_CONTOUR_COLOR)
+        ).astype(np.uint32)
+        self.dirty_limit = 1/16  # Share of the frame above which restoring pixels costs more than a copy
+
+        width, height = (int(length) for length in self.camera.view_px)
+        self.background = np.empty((height, width), dtype=np.uint32)  # RGBA pixels, see rgba()
+        self.frame = np.empty_like(self.background)
+        self.static_version = None  # World.nonliving_version and camera version painted in background
+        self.stamped = None  # Flat indices of the frame pixels painted with ants
+
+    def render(self) -> None:
+        self.paint()
+        self.blit()
+
+    def paint(self) -> None:
+        """Updates the frame buffer"""
+        if self.static_version != (self.world.nonliving_version, self.camera.version):
+            self.paint_background()
+            self.stamped = None
+        if self.mode == 'full' or self.stamped is None or len(self.stamped) > self.dirty_limit*self.frame.size:
+            self.frame[...] = self.background
+        else:
+            self.frame.ravel()[self.stamped] = self.background.ravel()[self.stamped]
+        self.stamp_ants()
+
+    def paint_background(self) -> None:
+        camera = self.camera
+        self.background[...] = rgba(BACKGROUND_COLOR)
+        for object in self.world.index.query_rect(*camera.visible_rect(self.food_radius)):
+            if isinstance(object, Nest):
+                radius, color = object.radius*camera.zoom, NEST_COLOR
+            elif isinstance(object, Food):
+                radius, color = self.food_radius, FOOD_COLOR
+            else:
+                continue
+            x, y = camera.to_screen(object.position.x, object.position.y)
+            self.stamp(self.background, np.array([x]), np.array([y]), disc_offsets(radius), rgba(color))
+        self.static_version = (self.world.nonliving_version, camera.version)
+
+    def stamp_ants(self) -> None:
+        camera = self.camera
+        xs, ys, _ = self.colony.positions()
+        if not camera.shows_all():
+            in_view = camera.visible(xs, ys, margin_px=3)
+            xs, ys = xs[in_view], ys[in_view]
+        px_xs, px_ys = camera.to_screen(xs, ys)
+        self.stamped = self.stamp(self.frame, px_xs, px_ys, self.ant_sprite, self.ant_colors)
+
+    @staticmethod
+    def stamp(pixels: np.ndarray, px_xs: np.ndarray, px_ys: np.ndarray, offsets,
+              colors: np.uint32 | np.ndarray) -> np.ndarray:
+        """Paints a sprite of offsets at each position, in one color or one per offset.
+        Returns flat indices of painted pixels"""
+        height, width = pixels.shape
+        dy, dx = offsets
+        cols = np.round(px_xs).astype(np.intp)[:, None] + dx
+        rows = np.round(px_ys).astype(np.intp)[:, None] + dy
+        inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+        flat = rows[inside]*width + cols[inside]
+        pixels.ravel()[flat] = np.broadcast_to(colors, inside.shape)[inside] if np.ndim(colors) else colors
+        return flat
+
+    def blit(self) -> None:
+        """Shows the frame buffer"""
+        import toga
+
+        height, width = self.frame.shape
+        self.image_view.image = toga.Image(src=encode_png(self.frame.view(np.uint8).reshape(height, width, 4)))
@@ -0,0 +1,307 @@
+"""
+Recorder captures Ant One's ant trajectories for offline analysis.
+Its purpose is to:
+- Record, after every tick, the state of each ant (idno, x, y, o, job) and the events of the tick
+- Store ticks in chunks, one compressed block per column, so that a reader only inflates what it needs
+- Compress and write chunks from a background thread: a tick only pays for copying ant arrays
+- Read traces back chunk by chunk, to iterate over ticks or seek to one without loading the whole file
+
+Opt-in: tau.add_recorder(TrajectoryRecorder(path, tau, colony)), or python -m ant_one.sim --record PATH.
+
+File layout, little endian:
+- magic (8 bytes), format version (uint32), header length (uint32)
+- header: JSON describing the game and how columns are encoded
+- chunks, each a series of zlib blocks, one per column
+- footer: JSON index of chunks (ticks, number of ants, where each block is)
+- footer offset (uint64), end magic (8 bytes)
+
+Positions and orientations are stored as uint16 fractions of the world size and of a turn,
+differenced along time: ants move little in a tick, so that deltas compress well.
+"""
+
+import bisect
+import json
+import logging
+import math
+import queue
+import struct
+import threading
+import zlib
+from enum import Enum
+
+import numpy as np
+
+from .events import EventKind
+from .game_resources import Colony, JOBS
+from .tau import Tau
+
+
+MAGIC = b'ANT1TRAC'
+END_MAGIC = b'ANT1TEND'
+VERSION = 1
+QUANTUM = 2**16  # Steps of uint16 positions and orientations
+
+# Per-tick columns: name -> dtype as stored, one row per recorded tick
+FRAME_COLUMNS = {'x': np.uint16, 'y': np.uint16, 'o': np.uint16, 'job': np.int8}
+RECORDED = ('idno', *FRAME_COLUMNS)  # Colony columns read every tick
+
+
+class TraceFormatError(ValueError):
+    """The file is not an Ant One trace, or not one this version can read"""
+
+
+def plain(value):
+    """Event field as JSON: enums as their values, numpy scalars as Python ones"""
+    if isinstance(value, dict):
+        return {plain(key): plain(item) for key, item in value.items()}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class TrajectoryRecorder():
+    """Writes ant states and events of a game to path, tick after tick, once added to Tau.
+    chunk_ticks: recorded ticks per chunk, a chunk also ends when the population changes
+    every: records one tick out of every
+    max_pending: chunks waiting for the writer before the simulation waits too
+    level: zlib compression level, low levels favour speed"""
+    def __init__(self, path, tau: Tau, colony: Colony, chunk_ticks: int=32, every: int=1,
+                 max_pending: int=4, level: int=1) -> None:
+        self.tau = tau
+        self.colony = colony
+        self.chunk_ticks = chunk_ticks
+        self.every = every
+        self.level = level
+        width, height = colony.world.size
+        self.scales = {'x': (QUANTUM-1)/width, 'y': (QUANTUM-1)/height, 'o': QUANTUM/(2*math.pi)}
+        self.events_cursor = tau.events.count  # Events before recording are not part of it
+
+        self.chunk = None  # Chunk being filled: {'loopno': [], 'idno': array, column: [arrays], 'events': []}
+        self.index = []  # Chunks written, see write_chunk
+        self.error = None  # Raised by the writer thread, re-raised by the recorder
+        self.f = open(path, 'wb')
+        header = json.dumps({
+            'world': {'size': [width, height]},
+            'sim_dt': tau.sim_dt,
+            'seed': tau.seed,
+            'engine': type(colony).__name__,
+            'every': every,
+            'jobs': [job.value for job in JOBS],
+            'scales': self.scales,
+        }).encode()
+        self.f.write(MAGIC + struct.pack('<II', VERSION, len(header)) + header)
+
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.writer = threading.Thread(target=self.write_chunks, name='trace writer', daemon=True)
+        self.writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self) -> None:
+        """Called by Tau after each tick"""
+        if self.error is not None:
+            raise self.error
+        loopno = self.tau.loopno
+        if loopno % self.every:
+            return
+        columns = self.colony.columns(RECORDED)
+        n_ants = len(columns['x'])
+        if self.chunk is not None and (
+                n_ants != len(self.chunk['idno']) or len(self.chunk['loopno']) >= self.chunk_ticks):
+            self.flush()
+        if self.chunk is None:
+            self.chunk = {'loopno': [], 'idno': np.array(columns['idno']), 'events': []}
+            self.chunk.update({name: [] for name in FRAME_COLUMNS})
+
+        # Only copies here, encoding is left to the writer
+        self.chunk['loopno'].append(loopno)
+        for name in FRAME_COLUMNS:
+            self.chunk[name].append(np.array(columns[name]))
+        events, self.events_cursor, dropped = self.tau.events.drain(self.events_cursor)
+        if dropped:
+            logging.warning(f'{dropped} events dropped before the recorder could read them')
+        self.chunk['events'].extend(events)
+
+    def flush(self) -> None:
+        """Hands the chunk being filled to the writer"""
+        if self.chunk is None:
+            return
+        if self.queue.full():
+            logging.warning('Trace writer is behind, the simulation waits for it')
+        self.queue.put(self.chunk)
+        self.chunk = None
+
+    def close(self) -> None:
+        """Writes what is left, then the index. Also stops recording if added to Tau"""
+        if self.f.closed:
+            return
+        if self in self.tau.recorders:
+            self.tau.recorders.remove(self)
+        self.flush()
+        self.queue.put(None)
+        self.writer.join()
+        if self.error is None:
+            footer_offset = self.f.tell()
+            self.f.write(json.dumps({'chunks': self.index}).encode())
+            self.f.write(struct.pack('<Q', footer_offset) + END_MAGIC)
+        self.f.close()
+        logging.info(f'Trace of {sum(entry["n_frames"] for entry in self.index)} ticks written to {self.f.name}')
+        if self.error is not None:
+            raise self.error
+
+    # Writer thread
+    def write_chunks(self) -> None:
+        while (chunk := self.queue.get()) is not None:
+            if self.error is not None:
+                continue  # Keep draining, so that the simulation never waits for a dead writer
+            try:
+                self.write_chunk(chunk)
+            except Exception as error:
+                self.error = error
+
+    def write_chunk(self, chunk: dict) -> None:
+        frames = {name: np.stack(chunk[name]) for name in FRAME_COLUMNS}
+        encoded = {
+            'loopno': np.array(chunk['loopno'], dtype=np.int64),
+            'idno': chunk['idno'].astype(np.int64),
+            'x': self.quantize(frames['x'], 'x'),
+            'y': self.quantize(frames['y'], 'y'),
+            'o': self.quantize(frames['o'], 'o'),
+            'job': frames['job'].astype(np.int8),
+        }
+        events = [(loopno, int(kind), *map(plain, fields)) for loopno, kind, *fields in chunk['events']]
+        blocks = {name: self.compress(array.tobytes()) for name, array in encoded.items()}
+        blocks['events'] = zlib.compress(json.dumps(events).encode(), self.level)
+
+        offset, layout = self.f.tell(), {}
+        for name, block in blocks.items():
+            layout[name] = [offset, len(block)]
+            offset += len(block)
+        self.f.write(b''.join(blocks.values()))
+        self.index.append({
+            'ticks': [chunk['loopno'][0], chunk['loopno'][-1]],
+            'n_frames': len(chunk['loopno']),
+            'n_ants': len(chunk['idno']),
+            'event_ticks': [events[0][0], events[-1][0]] if events else None,
+            'columns': layout,
+        })
+
+    def compress(self, data: bytes) -> bytes:
+        """zlib block matching runs only: deltas have few long matches, and this halves the cost of noisy ones"""
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_RLE)
+        return compressor.compress(data) + compressor.flush()
+
+    def quantize(self, values: np.ndarray, name: str) -> np.ndarray:
+        """uint16 fractions of the world size, or of a turn for orientations, differenced along time"""
+        scaled = np.round(values * self.scales[name])
+        if name == 'o':
+            steps = (scaled.astype(np.int64) & (QUANTUM-1)).astype(np.uint16)  # Wraps around
+        else:
+            steps = np.clip(scaled, 0, QUANTUM-1).astype(np.uint16)
+        steps[1:] -= steps[:-1].copy()
+        return steps
+
+
+class TraceReader():
+    """Reads a trace written by TrajectoryRecorder, one chunk at a time.
+    A frame is the state of the colony at one tick: a dict with loopno, and per ant
+    arrays idno, x, y, o (world units and radians) and job (codes, see header['jobs'])"""
+    def __init__(self, path) -> None:
+        self.f = open(path, 'rb')
+        prefix = self.f.read(len(MAGIC) + 8)
+        if len(prefix) < len(MAGIC) + 8 or not prefix.startswith(MAGIC):
+            self.f.close()
+            raise TraceFormatError('not an Ant One trace')
+        version, header_length = struct.unpack('<II', prefix[len(MAGIC):])
+        if version != VERSION:
+            self.f.close()
+            raise TraceFormatError(f'trace format version {version}, expected {VERSION}')
+        self.header = json.loads(self.f.read(header_length))
+
+        file_end = self.f.seek(0, 2)
+        self.f.seek(max(0, file_end - 8 - len(END_MAGIC)))
+        trailer = self.f.read()
+        if not trailer.endswith(END_MAGIC):
+            self.f.close()
+            raise TraceFormatError('trace has no index, its recorder was not closed')
+        footer_offset, = struct.unpack('<Q', trailer[:8])
+        self.f.seek(footer_offset)
+        self.chunks = json.loads(self.f.read(file_end - len(trailer) - footer_offset))['chunks']
+        self.firsts = [entry['ticks'][0] for entry in self.chunks]
+        self.cached = (None, None)  # Last chunk read: (chunk number, columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        """Number of recorded ticks"""
+        return sum(entry['n_frames'] for entry in self.chunks)
+
+    def close(self) -> None:
+        self.f.close()
+
+    def read_block(self, entry: dict, name: str) -> bytes:
+        offset, length = entry['columns'][name]
+        self.f.seek(offset)
+        return zlib.decompress(self.f.read(length))
+
+    def read_chunk(self, k: int) -> dict[str, np.ndarray]:
+        """Columns of chunk k, decoded. The last chunk read is kept"""
+        if self.cached[0] == k:
+            return self.cached[1]
+        entry = self.chunks[k]
+        shape = (entry['n_frames'], entry['n_ants'])
+        columns = {
+            'loopno': np.frombuffer(self.read_block(entry, 'loopno'), dtype=np.int64),
+            'idno': np.frombuffer(self.read_block(entry, 'idno'), dtype=np.int64),
+        }
+        for name, dtype in FRAME_COLUMNS.items():
+            columns[name] = np.frombuffer(self.read_block(entry, name), dtype=dtype).reshape(shape)
+        for name in ('x', 'y', 'o'):
+            columns[name] = np.cumsum(columns[name], axis=0, dtype=np.uint16) * (1/self.header['scales'][name])
+        self.cached = (k, columns)
+        return columns
+
+    def frames(self, start: int | None=None, stop: int | None=None):
+        """Yields frames of ticks start <= loopno < stop, reading chunks as they come"""
+        first_chunk = 0 if start is None else max(0, bisect.bisect_right(self.firsts, start) - 1)
+        for k in range(first_chunk, len(self.chunks)):
+            if stop is not None and self.firsts[k] >= stop:
+                return
+            columns = self.read_chunk(k)
+            for row, loopno in enumerate(columns['loopno'].tolist()):
+                if start is not None and loopno < start:
+                    continue
+                if stop is not None and loopno >= stop:
+                    return
+                yield {
+                    'loopno': loopno,
+                    'idno': columns['idno'],
+                    **{name: columns[name][row] for name in FRAME_COLUMNS},
+                }
+
+    def seek(self, loopno: int) -> dict | None:
+        """Frame of the first tick recorded at or after loopno, None if there is none"""
+        return next(self.frames(start=loopno), None)
+
+    def events(self, start: int | None=None, stop: int | None=None):
+        """Yields events (loopno, kind, a, b, c) of ticks start <= loopno < stop.
+        Enums in fields are read back as their values"""
+        for entry in self.chunks:
+            if entry['event_ticks'] is None:
+                continue
+            first, last = entry['event_ticks']
+            if (start is not None and last < start) or (stop is not None and first >= stop):
+                continue
+            for loopno, kind, a, b, c in json.loads(self.read_block(entry, 'events')):
+                if (start is None or loopno >= start) and (stop is None or loopno < stop):
+                    yield loopno, EventKind(kind), a, b, c
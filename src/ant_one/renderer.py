@@ -0,0 +1,133 @@
+"""
+Renderer of the play screen.
+Draws in retained mode on a toga Canvas: each layer is a sub-context of the
+canvas that is only rebuilt when needed.
+- Static layer: nest and food, rebuilt when World.nonliving_objects or the camera changes
+- Ant layer: redrawn every frame, with a level of detail depending on the population.
+  Small colonies use the cached pimped ant sprite, larger ones have all ants batched
+  in a few shared paths. Beyond density_limit, ants are binned in cells drawn as a
+  density map, so that frame cost depends on the canvas size rather than on the population
+Only what the camera sees is drawn: objects are picked from the World spatial index,
+ants by a mask over their positions.
+Game objects know nothing of drawing: the renderer picks a drawing by type of object.
+"""
+
+import numpy as np
+
+from .camera import Camera
+from .drawings import DENSITY_COLORS, draw_ant, draw_density, draw_foods, draw_mini_ants, draw_nest_entrance
+from .game_resources import Colony, Food, Nest, World
+
+
+def world_units(length: float) -> float:
+    """to_px of objects drawn under the camera transform"""
+    return length
+
+
+# Type of static object -> drawing in World units, food excepted (batched in draw_foods)
+STATIC_DRAWINGS = {
+    Nest: lambda context, nest: draw_nest_entrance(context, world_units, nest.x, nest.y, nest.radius),
+}
+
+
+class CanvasRenderer():
+    """Draws a World and its Colony on a canvas
+    settings: UserSettings whose pimped ant is used for small colonies, if given
+    density_overlay: draw ants near the nest or marking a trail over the density map
+    camera: shared with another renderer to keep the view when switching, new if not given"""
+    def __init__(self, canvas, world: World, colony: Colony, settings=None, density_overlay: bool=True,
+                 camera: Camera | None=None) -> None:
+        self.canvas = canvas
+        self.world = world
+        self.colony = colony
+        self.settings = settings
+        self.sprite_limit = 50  # Max population drawn with sprites
+        self.sprite_scale = 0.06
+        self.density_limit = 2000  # Max population drawn ant by ant
+        self.density_cell = 8  # In pixels
+        self.density_overlay = density_overlay
+        self.overlay_limit = 300  # Max ants drawn over the density map
+        self.cull_margin = 50  # In pixels, for things partly in view
+        self.camera = camera or Camera(world.size, world.px_size)
+
+        self.canvas.context.clear()
+        with self.canvas.context.Context() as self.static_layer:
+            pass
+        with self.canvas.context.Context() as self.ant_layer:
+            pass
+        self.static_version = None  # World.nonliving_version and camera version drawn in static layer
+
+    def render(self) -> None:
+        if self.static_version != (self.world.nonliving_version, self.camera.version):
+            self.draw_static_layer()
+        self.draw_ant_layer()
+
+    def draw_static_layer(self) -> None:
+        camera = self.camera
+        self.static_layer.clear()
+        objects = self.world.index.query_rect(*camera.visible_rect(self.cull_margin))
+        foods = [object.position for object in objects if isinstance(object, Food)]
+        with self.static_layer.Context() as view:
+            # Static drawings work in World units
+            view.translate(-camera.x*camera.zoom, -camera.y*camera.zoom)
+            view.scale(camera.zoom, camera.zoom)
+            for object in objects:
+                draw = STATIC_DRAWINGS.get(type(object))
+                if draw is not None:
+                    draw(view, object)
+        xs, ys = camera.to_screen(
+            np.array([position.x for position in foods]), np.array([position.y for position in foods])
+        )
+        draw_foods(self.static_layer, xs.tolist(), ys.tolist())
+        self.static_version = (self.world.nonliving_version, camera.version)
+
+    def draw_ant_layer(self) -> None:
+        camera = self.camera
+        xs, ys, os = self.colony.positions()
+        shown = None  # Indices of ants in view, if some are not
+        if not camera.shows_all():
+            shown = np.flatnonzero(camera.visible(xs, ys, self.cull_margin))
+            xs, ys, os = xs[shown], ys[shown], os[shown]
+        px_xs, px_ys = camera.to_screen(xs, ys)
+
+        self.ant_layer.clear()
+        if len(xs) > self.density_limit:
+            self.draw_density_map(px_xs, px_ys)
+            if self.density_overlay:
+                trails = self.colony.trails() if shown is None else self.colony.trails()[shown]
+                nest = self.colony.nest
+                near_nest = (np.abs(xs-nest.x) < 2*nest.radius) & (np.abs(ys-nest.y) < 2*nest.radius)
+                highlighted = np.flatnonzero(near_nest | (trails > 0))[:self.overlay_limit]
+                draw_mini_ants(self.ant_layer, px_xs[highlighted], px_ys[highlighted], os[highlighted])
+            return
+        if self.settings is None or len(xs) > self.sprite_limit:
+            draw_mini_ants(self.ant_layer, px_xs, px_ys, os)
+            return
+        scale = self.sprite_scale * camera.zoom/camera.min_zoom
+        for x, y, o in zip(px_xs.tolist(), px_ys.tolist(), os.tolist()):
+            draw_ant(
+                self.ant_layer,
+                self.settings.pimp_color_legs,
+                self.settings.pimp_color_antennae,
+                self.settings.pimp_color_body,
+                translate=(x, y),
+                scale=scale,
+                rotate=o
+            )
+
+    def draw_density_map(self, px_xs: np.ndarray, px_ys: np.ndarray) -> None:
+        """Ants counted by cell, from their positions in pixels.
+        Levels of density are powers of 2: 1, 2-3, 4-7..."""
+        cell = self.density_cell
+        n_cols = -(-self.camera.view_px[0] // cell)
+        n_rows = -(-self.camera.view_px[1] // cell)
+        cols = (px_xs * (1/cell)).astype(np.intp)
+        rows = (px_ys * (1/cell)).astype(np.intp)
+        np.clip(cols, 0, n_cols-1, out=cols)
+        np.clip(rows, 0, n_rows-1, out=rows)
+        rows *= n_cols
+        rows += cols
+        counts = np.bincount(rows, minlength=n_rows*n_cols)
+        cells = np.flatnonzero(counts)
+        levels = np.minimum(np.frexp(counts[cells])[1] - 1, len(DENSITY_COLORS)-1)
+        draw_density(self.ant_layer, (cells % n_cols)*cell, (cells // n_cols)*cell, levels, cell)
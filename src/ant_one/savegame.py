@@ -0,0 +1,203 @@
+"""
+Savegame persists Ant One's whole simulation state.
+Its purpose is to:
+- Save Tau clocks, the World with its food and pheromones, the Nest, the Colony and every ant to one file
+- Store ants as columns (one array per attribute), so that saving is a few large writes
+- Load columns memory-mapped, so that a large colony is back without building an object per ant
+
+File layout, little endian:
+- magic (8 bytes), format version (uint32), header length (uint32)
+- header: JSON describing the game and where each column is
+- columns, each starting at a multiple of 64 bytes from the start of data
+"""
+
+import datetime
+import json
+import os
+import struct
+
+import numpy as np
+
+from .game_resources import Colony, Food, Nest, World, JOBS, NEEDS
+from .random_pool import RandomPool
+from .scheduler import Scheduler
+from .swarm import VectorColony
+from .tau import Tau
+from .world_physics import Position
+
+
+MAGIC = b'ANT1SAVE'
+VERSION = 3
+ALIGN = 64
+
+# Ant columns: name -> (shape of one row, dtype)
+COLUMNS = VectorColony.fields
+
+
+class SaveFormatError(ValueError):
+    """The file is not an Ant One save, or not one this version can read"""
+
+
+def rng_state(rng) -> dict:
+    """JSON-friendly state of a RandomPool or numpy Generator"""
+    if isinstance(rng, np.random.Generator):
+        return {'numpy': rng.bit_generator.state}
+    return {'pool': rng.getstate()}
+
+
+def set_rng_state(rng, state: dict) -> None:
+    """Restores a state from rng_state. Ignored if it comes from another kind of generator,
+    e.g. a game saved with another colony engine"""
+    if isinstance(rng, np.random.Generator) and 'numpy' in state:
+        rng.bit_generator.state = state['numpy']
+    elif isinstance(rng, RandomPool) and 'pool' in state:
+        rng.setstate(state['pool'])
+
+
+def timers(world: World, colony: Colony) -> dict:
+    return {
+        'food': world.food_timer,
+        'pheromones': world.pheromones.timer,
+        'upkeep': colony.upkeep_timer,
+        'allocation': colony.allocation_timer,
+    }
+
+
+def aligned(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def save(path, tau: Tau, world: World, nest: Nest, colony: Colony) -> None:
+    """Writes the game to path. The file is replaced at once, a crash never leaves half a save"""
+    ant_columns = colony.columns()
+    columns = {
+        name: np.ascontiguousarray(ant_columns[name], dtype=dtype).reshape(-1, *shape)
+        for name, (shape, dtype) in COLUMNS.items()
+    }
+    columns['food'] = np.array(
+        [(nlo.position.x, nlo.position.y) for nlo in world.nonliving_objects if isinstance(nlo, Food)],
+        dtype=np.float64
+    ).reshape(-1, 2)
+    columns['pheromones'] = world.pheromones.grid
+    columns['pheromone_deposits'] = world.pheromones.deposits
+    columns['living_order'] = np.array(colony.living_order(), dtype=np.int64)
+
+    layout, offset = {}, 0
+    for name, array in columns.items():
+        layout[name] = {'offset': offset, 'shape': array.shape, 'dtype': array.dtype.str}
+        offset = aligned(offset + array.nbytes)
+
+    header = json.dumps({
+        'tau': {
+            'seed': tau.seed,
+            'sim_dt': tau.sim_dt,
+            'vtime': tau.vtime.isoformat(),
+            'time_factor': tau.time_factor,
+            'loopno': tau.loopno,
+            'scheduler_now': tau.scheduler.now,
+        },
+        'world': {'size': list(world.size)},
+        # Next call of recurring timers, in scheduler time. Sleeping ants are in the wake column
+        'timers': {name: timer.due for name, timer in timers(world, colony).items()},
+        'nest': {'x': nest.x, 'y': nest.y, 'radius': nest.radius},
+        'colony': {
+            'engine': type(colony).__name__,
+            'ant_idno': colony.ant_idno,
+            'stock_food': colony.stock_food,
+            'needs': {need.value: value for need, value in colony.needs.items()},
+        },
+        'rng': {
+            'world': rng_state(world.rng),
+            'colony': rng_state(colony.rng),
+            'colony/ants': rng_state(colony.ants_rng),
+        },
+        'jobs': [job.value for job in JOBS],
+        'needs': [need.value for need in NEEDS],
+        'columns': layout,
+    }).encode()
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<II', VERSION, len(header)) + header)
+        data_start = aligned(f.tell())
+        for name, array in columns.items():
+            f.seek(data_start + layout[name]['offset'])
+            array.tofile(f)
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_header(f) -> tuple[dict, int]:
+    """Returns the header of an open save file and where its data starts"""
+    prefix = f.read(len(MAGIC) + 8)
+    if len(prefix) < len(MAGIC) + 8 or not prefix.startswith(MAGIC):
+        raise SaveFormatError('not an Ant One save file')
+    version, header_length = struct.unpack('<II', prefix[len(MAGIC):])
+    if version != VERSION:
+        raise SaveFormatError(f'save format version {version}, expected {VERSION}')
+    header = json.loads(f.read(header_length))
+    if header['jobs'] != [job.value for job in JOBS] or header['needs'] != [need.value for need in NEEDS]:
+        raise SaveFormatError('save made with other jobs or needs')
+    return header, aligned(len(prefix) + header_length)
+
+
+def load(path, tau: Tau | None=None, px_size: tuple[int, int] | None=None, colony_cls=VectorColony,
+         mmap: bool=True) -> tuple[Tau, World, Nest, Colony]:
+    """Reads a game saved by save(). A new Tau is created if none is given.
+    px_size: canvas size, defaults to the world size
+    mmap: maps ant columns copy-on-write instead of reading them, the file is never modified"""
+    with open(path, 'rb') as f:
+        header, data_start = read_header(f)
+        if mmap:
+            data = np.memmap(f, dtype=np.uint8, mode='c')
+        else:
+            f.seek(0)
+            data = np.frombuffer(bytearray(f.read()), dtype=np.uint8)
+    columns = {}
+    for name, column in header['columns'].items():
+        dtype, shape = np.dtype(column['dtype']), tuple(column['shape'])
+        start = data_start + column['offset']
+        columns[name] = data[start:start + int(np.prod(shape))*dtype.itemsize].view(dtype).reshape(shape)
+
+    # Time engine
+    saved_tau = header['tau']
+    if tau is None:
+        tau = Tau(seed=saved_tau['seed'], sim_dt=saved_tau['sim_dt'])
+    else:
+        tau.seed = saved_tau['seed']
+        tau.sim_dt = saved_tau['sim_dt']
+        tau.scheduler = Scheduler()  # Timers of the previous game go with it
+    tau.vtime = datetime.datetime.fromisoformat(saved_tau['vtime'])
+    tau.time_factor = saved_tau['time_factor']
+    tau.loopno = saved_tau['loopno']
+    tau.scheduler.now = saved_tau['scheduler_now']
+
+    # World, nest and food
+    world = World(tau=tau, px_size=px_size or tuple(header['world']['size']), size=tuple(header['world']['size']))
+    saved_nest = header['nest']
+    nest = Nest(world, position=Position(saved_nest['x'], saved_nest['y']), radius=saved_nest['radius'])
+    for x, y in columns.pop('food').tolist():
+        world.add_object(Food(Position(x, y)))
+    world.pheromones.grid = np.array(columns.pop('pheromones'))
+    world.pheromones.deposits = np.array(columns.pop('pheromone_deposits'))
+    world.pheromones.update_gradient()
+
+    # Colony
+    colony = colony_cls(nest)
+    living_order = columns.pop('living_order').tolist()  # Empty if saved by an engine without order
+    colony.attach(columns, living_order if len(living_order) == len(columns['x']) else None)
+    saved_colony = header['colony']
+    colony.ant_idno = saved_colony['ant_idno']
+    colony.stock_food = saved_colony['stock_food']
+    for need in colony.needs:
+        colony.needs[need] = saved_colony['needs'][need.value]
+
+    set_rng_state(world.rng, header['rng']['world'])
+    set_rng_state(colony.rng, header['rng']['colony'])
+    set_rng_state(colony.ants_rng, header['rng']['colony/ants'])
+
+    for name, timer in timers(world, colony).items():
+        tau.scheduler.reschedule(timer, header['timers'][name])
+
+    tau.add_world(world)
+    return tau, world, nest, colony
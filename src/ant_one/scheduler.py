@@ -0,0 +1,81 @@
+"""
+Scheduler runs Ant One's timed processes.
+Its purpose is to:
+- Call processes at their own cadence in virtual time (food spawn, colony upkeep, pheromones),
+  instead of polling them every tick
+- Let idle entities sleep until a wake-up time, so that a tick only costs what is active
+- Keep timers in a heap: a tick with nothing due costs one comparison
+
+Tau owns the scheduler of a game: tau.scheduler. Its clock is in virtual seconds since the game started.
+"""
+
+import heapq
+import itertools
+
+
+class Timer():
+    """Handle of a scheduled call, see Scheduler"""
+    __slots__ = ('due', 'period', 'callback', 'args', 'entry')
+
+    def __init__(self, due: float, period: float | None, callback, args: tuple) -> None:
+        self.due = due  # Virtual second of next call
+        self.period = period  # Virtual seconds between calls, None if called once
+        self.callback = callback
+        self.args = args
+        self.entry = None  # Heap entry, None once done or cancelled
+
+    @property
+    def pending(self) -> bool:
+        return self.entry is not None
+
+
+class Scheduler():
+    """Calls callbacks at virtual times. Calls due at the same time run in scheduling order"""
+    def __init__(self) -> None:
+        self.now = 0.0  # Virtual seconds
+        self.heap = []  # [due, seqno, timer]
+        self.seqno = itertools.count()
+
+    def at(self, due: float, callback, *args) -> Timer:
+        """Calls callback(*args) once at virtual second due"""
+        return self.push(Timer(due, None, callback, args))
+
+    def after(self, delay: float, callback, *args) -> Timer:
+        return self.at(self.now + delay, callback, *args)
+
+    def every(self, period: float, callback, *args, first: float | None=None) -> Timer:
+        """Calls callback(*args) every period virtual seconds, first one period from now or at first"""
+        return self.push(Timer(self.now + period if first is None else first, period, callback, args))
+
+    def push(self, timer: Timer) -> Timer:
+        timer.entry = [timer.due, next(self.seqno), timer]
+        heapq.heappush(self.heap, timer.entry)
+        return timer
+
+    def cancel(self, timer: Timer) -> None:
+        """Forgets a timer. Its heap entry is dropped when it comes up"""
+        if timer.entry is not None:
+            timer.entry[2] = None
+            timer.entry = None
+
+    def reschedule(self, timer: Timer, due: float) -> None:
+        """Moves the next call of a timer, e.g. when a game is loaded"""
+        self.cancel(timer)
+        timer.due = due
+        self.push(timer)
+
+    def advance(self, dt: float) -> None:
+        """Moves the clock by dt virtual seconds and runs what is due, in order.
+        A recurring timer late by several periods runs once per period"""
+        self.now += dt
+        heap = self.heap
+        while heap and heap[0][0] <= self.now:
+            _, _, timer = heapq.heappop(heap)
+            if timer is None:
+                continue
+            if timer.period is None:
+                timer.entry = None
+            else:
+                timer.due += timer.period
+                self.push(timer)
+            timer.callback(*timer.args)
@@ -0,0 +1,246 @@
+"""
+Shards spread Ant One's vectorized colony over several CPU cores.
+Its purpose is to:
+- Partition the World into vertical strips, each owned by a worker process
+- Let each worker step the ants that are in its strip, and hand over ants crossing to another strip
+- Keep ant arrays in shared memory, so that positions are never pickled between processes
+- Synchronise shared state (food) once per tick from the main process, which also allocates jobs
+- Leave to the main process what needs the whole World: steering towards food and trails, eating, laying trails
+
+Opt-in: use ShardedColony instead of VectorColony.
+"""
+
+import logging
+import multiprocessing
+import os
+import weakref
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from .game_resources import Food, Job, Nest, JOB_CODE
+from .swarm import VectorColony, move_ants
+from .world_physics import Position, SpatialHash
+
+
+def strip_of(x: np.ndarray, width: float, n_shards: int) -> np.ndarray:
+    """Shard owning each x coordinate"""
+    return np.clip((x * (n_shards/width)).astype(np.int16), 0, n_shards-1)
+
+
+class Spot():
+    """Stand-in for food in workers: a position and the index of the food in the main process"""
+    __slots__ = ('position', 'k')
+
+    def __init__(self, x: float, y: float, k: int) -> None:
+        self.position = Position(x, y)
+        self.k = k
+
+
+def shard_worker(conn, shard: int, n_shards: int, world, nest, max_pace: float, contact_radius: float, rng) -> None:
+    """Main loop of the worker process stepping ants of strip shard.
+    world, nest: the few attributes move_ants needs
+    Commands received through conn:
+    - ('attach', layout): map shared arrays, layout is {name: (segment name, shape, dtype)}
+    - ('food', food_xy): replace known food positions
+    - ('step', n_ants, dt, now, parity): step owned ants awake at scheduler time now, owner[:, parity]
+      is read and owner[:, 1-parity] written, so that handovers never race with other workers.
+      Replies with (ants touching food, matching food indices)
+    - ('stop',)"""
+    segments, arrays = [], {}
+    food_index = SpatialHash(world.size, contact_radius)
+    while True:
+        command, *args = conn.recv()
+
+        if command == 'attach':
+            layout, = args
+            for segment in segments:
+                segment.close()
+            segments, arrays = [], {}
+            for name, (segment_name, shape, dtype) in layout.items():
+                segment = shared_memory.SharedMemory(name=segment_name)
+                segments.append(segment)
+                arrays[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+        elif command == 'food':
+            food_xy, = args
+            food_index = SpatialHash(world.size, contact_radius)
+            for k, (x, y) in enumerate(food_xy.tolist()):
+                food_index.insert(Spot(x, y, k))
+
+        elif command == 'step':
+            n_ants, dt, now, parity = args
+            owner = arrays['owner']
+            owned = owner[:n_ants, parity] == shard
+            awake = arrays['wake'][:n_ants] <= now
+            owner[np.flatnonzero(owned & ~awake), 1-parity] = shard  # Sleeping ants stay put
+            idx = np.flatnonzero(owned & awake)
+            x, y, o = arrays['x'][idx], arrays['y'][idx], arrays['o'][idx]
+            speed_factor_h = arrays['speed_factor_h'][idx]
+            move_ants(
+                x, y, o, speed_factor_h,
+                jobless=arrays['job'][idx] == JOB_CODE[Job.JOBLESS],
+                dt=dt,
+                max_pace=max_pace,
+                world=world,
+                nest=nest,
+                rng=rng
+            )
+            arrays['x'][idx], arrays['y'][idx], arrays['o'][idx] = x, y, o
+            arrays['speed_factor_h'][idx] = speed_factor_h
+            owner[idx, 1-parity] = strip_of(x, world.size[0], n_shards)  # Handover
+
+            ant_idx, spot_idx, spots = food_index.query_pairs(x, y, contact_radius)
+            food_k = np.array([spots[j].k for j in spot_idx.tolist()], dtype=np.intp)
+            conn.send((idx[ant_idx], food_k))
+
+        elif command == 'stop':
+            arrays.clear()
+            for segment in segments:
+                segment.close()
+            conn.close()
+            return
+
+
+def shutdown(segments: dict, retired_segments: list, workers: list) -> None:
+    """Stops workers and frees shared memory. Also called when a ShardedColony is collected.
+    Arrays using the segments must be gone: their memory is unmapped"""
+    for process, conn in workers:
+        try:
+            conn.send(('stop',))
+        except (BrokenPipeError, OSError):
+            pass
+    for process, conn in workers:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+        conn.close()
+    workers.clear()
+    for segment in segments.values():
+        segment.close()
+        segment.unlink()
+    segments.clear()
+    for segment in retired_segments:
+        segment.close()
+    retired_segments.clear()
+
+
+class ShardedColony(VectorColony):
+    """Defines a VectorColony whose ants are stepped by n_shards worker processes,
+    each owning a vertical strip of the World"""
+    fields = {
+        **VectorColony.fields,
+        'owner': ((2,), np.int16),  # Shard owning each ant, one column per tick parity
+    }
+
+    def __init__(self, nest: Nest, capacity: int=1024, n_shards: int | None=None) -> None:
+        self.segments = {}  # Field name -> SharedMemory, filled by allocate
+        self.retired_segments = []  # Unlinked when arrays grew, closed at shutdown
+        self.workers = []  # (process, connection)
+        self.n_shards = n_shards or os.cpu_count()
+        self.parity = 0
+        self.foods = []  # Food known by workers, in the order they were sent
+        self.food_version = None
+        super().__init__(nest, capacity)
+        self._finalizer = weakref.finalize(self, shutdown, self.segments, self.retired_segments, self.workers)
+
+    def allocate(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        segment = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        self.segments[name] = segment
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        array[...] = 0
+        return array
+
+    def layout(self) -> dict:
+        return {
+            name: (self.segments[name].name, getattr(self, name).shape, getattr(self, name).dtype.str)
+            for name in self.fields
+        }
+
+    def reserve(self, capacity: int) -> None:
+        if capacity <= self.capacity:
+            return
+        old_segments = list(self.segments.values())
+        super().reserve(capacity)
+        for segment in old_segments:
+            # Closing would unmap memory that views of the old arrays might still use
+            segment.unlink()
+            self.retired_segments.append(segment)
+        self.broadcast(('attach', self.layout()))
+
+    def populate(self, n_ants: int) -> None:
+        start = self.n_ants
+        super().populate(n_ants)
+        self.owner[start:self.n_ants] = strip_of(self.x[start:self.n_ants], self.world.size[0], self.n_shards)[:, None]
+
+    def attach(self, columns: dict[str, np.ndarray], living_order: list[int] | None=None) -> None:
+        """Copies columns into shared memory. The colony must have no ant yet"""
+        n_ants = len(columns['x'])
+        self.reserve(n_ants)
+        for name in VectorColony.fields:
+            getattr(self, name)[:n_ants] = columns[name]
+        self.owner[:n_ants] = strip_of(self.x[:n_ants], self.world.size[0], self.n_shards)[:, None]
+        self.n_ants = n_ants
+
+    def start(self) -> None:
+        """Starts worker processes"""
+        context = multiprocessing.get_context('spawn')
+        world = SimpleNamespace(size=tuple(self.world.size), no_go_border=self.world.no_go_border)
+        nest = SimpleNamespace(x=self.nest.x, y=self.nest.y, attraction_radius=self.nest.attraction_radius)
+        for shard in range(self.n_shards):
+            conn, worker_conn = context.Pipe()
+            process = context.Process(
+                target=shard_worker,
+                args=(
+                    worker_conn, shard, self.n_shards, world, nest, self.max_pace, self.world.contact_radius,
+                    self.world.tau.np_random_stream(f'colony/shard/{shard}')
+                ),
+                daemon=True
+            )
+            process.start()
+            worker_conn.close()
+            self.workers.append((process, conn))
+        self.broadcast(('attach', self.layout()))
+        logging.info(f'Colony sharded over {self.n_shards} worker processes')
+
+    def close(self) -> None:
+        """Stops worker processes and frees shared memory.
+        The colony keeps private copies of its arrays, but can no longer live"""
+        for name in self.fields:
+            setattr(self, name, np.array(getattr(self, name)))
+        self._finalizer()
+
+    def broadcast(self, message: tuple) -> None:
+        for _, conn in self.workers:
+            conn.send(message)
+
+    def live(self):
+        if not self.workers:
+            self.start()
+
+        if self.food_version != self.world.nonliving_version:
+            self.foods = [nlo for nlo in self.world.nonliving_objects if isinstance(nlo, Food)]
+            food_xy = np.array([(food.position.x, food.position.y) for food in self.foods], dtype=float)
+            self.broadcast(('food', food_xy.reshape(-1, 2)))
+            self.food_version = self.world.nonliving_version
+
+        dt = self.world.tau.vt_loop_duration
+        self.broadcast(('step', self.n_ants, dt, self.world.tau.scheduler.now, self.parity))
+        replies = [conn.recv() for _, conn in self.workers]
+        self.parity = 1 - self.parity
+
+        # Same order as VectorColony.live: foragers steer while food found is still there
+        self.steer_foragers(dt)
+
+        # Food touched by several ants goes to the first one
+        ant_idx = np.concatenate([reply[0] for reply in replies])
+        food_k = np.concatenate([reply[1] for reply in replies])
+        order = np.lexsort((ant_idx, food_k))
+        food_k, first = np.unique(food_k[order], return_index=True)
+        for k, i in zip(food_k.tolist(), ant_idx[order][first].tolist()):
+            self.eat(i, self.foods[k])
+
+        self.lay_trails(dt)
+        self.take_naps()
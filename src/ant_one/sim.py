@@ -0,0 +1,178 @@
+"""
+Headless runner for Ant One's simulation.
+Builds the same world as the play screen without importing toga, and advances
+it at a fixed virtual timestep as fast as the CPU allows.
+
+Usage: python -m ant_one.sim --ants 10000 --ticks 50000 --dt 0.03 --seed 1
+
+A run is reproducible from its seed: --digest prints a fingerprint of the final
+state, and --expect checks a run against a recorded fingerprint. --save writes
+the final state, which --load resumes. --record writes ant trajectories and events
+to a trace, read with recorder.TraceReader.
+--import-time measures the cold import of the simulation core, which loads neither
+toga nor drawings, so that many headless processes start fast.
+"""
+
+import argparse
+import functools
+import hashlib
+import logging
+import os
+import struct
+import subprocess
+import sys
+import time
+
+from . import savegame
+from .events import log_events
+from .game_resources import Colony, ColonyNeed, create_game
+from .recorder import TrajectoryRecorder
+from .shards import ShardedColony
+from .swarm import VectorColony
+from .tau import Tau
+
+
+ENGINES = {
+    'object': Colony,
+    'vector': VectorColony,
+    'sharded': ShardedColony,
+}
+CORE_MODULES = ('ant_one.tau', 'ant_one.world_physics', 'ant_one.game_resources')  # The simulation model
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m ant_one.sim',
+        description='Runs the Ant One simulation without a display'
+    )
+    parser.add_argument('--ants', type=int, default=10, help='initial colony population of a new game')
+    parser.add_argument('--ticks', type=int, default=1000, help='number of simulation steps')
+    parser.add_argument('--dt', type=float, default=0.03, help='virtual seconds per step')
+    parser.add_argument('--seed', type=int, default=None, help='seed for reproducible runs')
+    parser.add_argument('--size', type=int, nargs=2, default=(1000, 600), metavar=('WIDTH', 'HEIGHT'),
+                        help='world size in game units')
+    parser.add_argument('--engine', choices=ENGINES, default='object',
+                        help='colony backend (default: object, as in the play screen)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes of the sharded engine (default: one per core)')
+    parser.add_argument('--trails', action='store_true', help='make foragers follow pheromone trails')
+    parser.add_argument('--digest', action='store_true', help='print a fingerprint of the final state')
+    parser.add_argument('--expect', metavar='DIGEST', help='fail if the final state fingerprint differs')
+    parser.add_argument('--load', metavar='PATH', help='resume a saved game instead of starting a new one')
+    parser.add_argument('--save', metavar='PATH', help='save the final state')
+    parser.add_argument('--record', metavar='PATH', help='record ant trajectories and events to a trace')
+    parser.add_argument('--telemetry', action='store_true', help='print per-phase timings')
+    parser.add_argument('--profile', type=int, metavar='N', help='print a cProfile of the first N ticks')
+    parser.add_argument('--import-time', action='store_true',
+                        help='only measure the cold import of the simulation core')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log game events')
+    return parser.parse_args(argv)
+
+
+def cold_import(modules: tuple[str, ...]=CORE_MODULES) -> tuple[float, list[str]]:
+    """Seconds taken to import modules in a fresh interpreter, and all modules it then had loaded"""
+    code = (
+        'import sys, time\nrt_start = time.perf_counter()\n'
+        + ''.join(f'import {module}\n' for module in modules)
+        + 'print(time.perf_counter() - rt_start)\nprint(*sorted(sys.modules))'
+    )
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')]))}
+    out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    duration, loaded = out.splitlines()
+    return float(duration), loaded.split()
+
+
+def build(args: argparse.Namespace) -> tuple[Tau, Colony]:
+    """Creates the time engine and a populated game from parsed arguments"""
+    colony_cls = (functools.partial(ShardedColony, n_shards=args.workers)
+                  if args.engine == 'sharded' else ENGINES[args.engine])
+    if args.load:
+        tau, _, _, colony = savegame.load(args.load, colony_cls=colony_cls)
+    else:
+        tau = Tau(seed=args.seed, sim_dt=args.dt)
+        world, nest, colony = create_game(tau=tau, px_size=tuple(args.size), n_ants=0, colony_cls=colony_cls)
+        colony.populate(args.ants)
+    colony.follow_trails = args.trails
+    return tau, colony
+
+
+def colony_stats(colony: Colony) -> dict:
+    return {
+        'ants': len(colony.population),
+        'jobs': {job.value: count for job, count in colony.count_jobs().items()},
+        'stock_food': colony.stock_food,
+        'need_getfood': colony.needs[ColonyNeed.GETFOOD],
+        'food_on_map': len(colony.world.nonliving_objects) - 1,  # Nest excluded
+    }
+
+
+def state_digest(tau: Tau, colony: Colony) -> str:
+    """Fingerprint of the game state, equal for two bit-for-bit identical runs"""
+    digest = hashlib.sha256()
+    digest.update(struct.pack('<qd', tau.loopno, (tau.vtime - tau.vtime.min).total_seconds()))
+    digest.update(struct.pack('<dd', colony.stock_food, colony.needs[ColonyNeed.GETFOOD]))
+    for ant in colony.population:
+        digest.update(struct.pack('<qddd', ant.idno, ant.x, ant.y, ant.o))
+        digest.update(ant.job.value.encode())
+    for nlo in colony.world.nonliving_objects:
+        digest.update(struct.pack('<dd', nlo.position.x, nlo.position.y))
+    return digest.hexdigest()
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    logging.basicConfig(
+        format='%(asctime)s %(levelname)s %(message)s',
+        level=logging.INFO if args.verbose else logging.WARNING
+    )
+    if args.import_time:
+        duration, loaded = cold_import()
+        print(f'Simulation core imported in {duration*1000:.0f} ms, {len(loaded)} modules loaded')
+        return {'import_time': duration, 'modules': loaded}
+
+    tau, colony = build(args)
+    if args.verbose:
+        tau.events.subscribe(log_events, replay=True)
+    if args.profile:
+        tau.telemetry.profile(args.profile)
+
+    recorder = None
+    if args.record:
+        recorder = TrajectoryRecorder(args.record, tau, colony)
+        tau.add_recorder(recorder)
+
+    rt_start = time.perf_counter()
+    tau.run(args.ticks)
+    if recorder is not None:
+        recorder.close()  # Timed: ticks/s includes waiting for the last chunks
+    rt_duration = time.perf_counter() - rt_start
+    if args.save:
+        savegame.save(args.save, tau, colony.world, colony.nest, colony)
+    if isinstance(colony, ShardedColony):
+        colony.close()
+
+    stats = colony_stats(colony)
+    tps = args.ticks / rt_duration if rt_duration else float('inf')
+    print(f'{args.ticks} ticks of {tau.sim_dt}s in {rt_duration:.2f}s: {tps:.0f} ticks/s, '
+          f'{tps*stats["ants"]:.0f} ant-ticks/s ({args.engine} engine)')
+    print(f'Day {tau.vtime:%d %H:%M:%S}, {stats["ants"]} ants '
+          f'({", ".join(f"{count} {job}" for job, count in stats["jobs"].items())}), '
+          f'{stats["stock_food"]:.2f} food in stock, need to get food {stats["need_getfood"]:.2f}, '
+          f'{stats["food_on_map"]} food on map')
+    if args.telemetry:
+        print(tau.telemetry.report())
+    if tau.telemetry.profile_report:
+        print(tau.telemetry.profile_report)
+
+    stats['seed'] = tau.seed
+    stats['digest'] = state_digest(tau, colony)
+    if args.digest or args.expect:
+        print(f'Seed {tau.seed}, state digest {stats["digest"]}')
+    if args.expect and args.expect != stats['digest']:
+        sys.exit(f'State digest differs from expected {args.expect}')
+    return stats
+
+
+if __name__ == '__main__':
+    main()
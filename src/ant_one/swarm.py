@@ -0,0 +1,323 @@
+"""
+Swarm is Ant One's vectorized colony engine.
+Its purpose is to:
+- Store the whole population of a colony as a structure of arrays
+- Move all ants in one batched step instead of one Ant.live() call per ant
+- Keep Ant-like views over the arrays so that rendering code is unchanged
+
+Opt-in: use VectorColony instead of Colony.
+"""
+
+import math
+from collections.abc import Sequence
+
+import numpy as np
+
+from .events import EventKind
+from .game_resources import Colony, Food, Job, Nest, JOBS, JOB_CODE, NEEDS, NEED_COL, SPEED_HISTORY, assign_jobs
+from .world_physics import Position, turn_towards
+
+
+def move_ants(x, y, o, speed_factor_h, jobless, dt, max_pace, world, nest, rng) -> None:
+    """Batched equivalent of Ant.live() movement, updates arrays in place
+    x, y, o: positions and orientations
+    speed_factor_h: (n, SPEED_HISTORY) history of speed factors, oldest first
+    jobless: boolean mask of ants attracted back to the nest
+    rng: numpy Generator"""
+    n = len(x)
+    if n == 0:
+        return
+
+    # Random movement: first go straight, then turn
+    speed_factor = (speed_factor_h.sum(axis=1) + rng.random(n)) / (SPEED_HISTORY+1)
+    max_distance = max_pace*dt
+    new_x = x - np.round(max_distance*speed_factor*np.cos(o))
+    new_y = y - np.round(max_distance*speed_factor*np.sin(o))
+    rotation = np.maximum(0, 1-speed_factor*2) * rng.normal(0, 6, n)*dt  # The more speed, the less turning
+    new_o = o + rotation*math.pi
+
+    # Border clamping, blocked ants loose their speed
+    border = world.no_go_border
+    clamped_x = np.clip(new_x, border, world.size[0]-border)
+    clamped_y = np.clip(new_y, border, world.size[1]-border)
+    speed_factor[(clamped_x != new_x) | (clamped_y != new_y)] = 0
+    new_x, new_y = clamped_x, clamped_y
+
+    # If jobless ants go away from nest, slow them down to bring them back
+    idx = np.flatnonzero(jobless)
+    if len(idx):
+        curr_pos_dist = np.hypot(x[idx]-nest.x, y[idx]-nest.y)
+        new_pos_dist = np.hypot(new_x[idx]-nest.x, new_y[idx]-nest.y)
+        attracted = (new_pos_dist > 0.9*curr_pos_dist) & (curr_pos_dist >= nest.attraction_radius)
+        idx = idx[attracted]
+        attraction_factor = (new_pos_dist[attracted] / nest.attraction_radius)**1.5
+        new_x[idx] = (new_x[idx] + x[idx]*attraction_factor)/(1+attraction_factor)
+        new_y[idx] = (new_y[idx] + y[idx]*attraction_factor)/(1+attraction_factor)
+        new_o[idx] += rng.normal(0, 0.5, len(idx))*math.pi/6
+
+    speed_factor_h[:, :-1] = speed_factor_h[:, 1:]
+    speed_factor_h[:, -1] = speed_factor
+    x[:] = new_x
+    y[:] = new_y
+    o[:] = new_o
+
+
+class VectorColony(Colony):
+    """Defines a colony whose ants are stored as arrays and live in one batched step.
+    Drop-in replacement for Colony: population holds AntView objects"""
+    # Structure of arrays: name -> (shape of one row, dtype)
+    fields = {
+        'idno': ((), np.int64),
+        'x': ((), np.float64),
+        'y': ((), np.float64),
+        'o': ((), np.float64),
+        'speed_factor_h': ((SPEED_HISTORY,), np.float64),
+        'job': ((), np.int8),
+        'thresholds': ((len(NEEDS),), np.float64),
+        'trail': ((), np.float64),
+        'wake': ((), np.float64),  # Scheduler time a sleeping ant wakes up at, see Ant.sleep_until
+    }
+
+    def __init__(self, nest: Nest, capacity: int=1024) -> None:
+        super().__init__(nest)
+        self.rng = self.world.tau.np_random_stream('colony')  # Births and all ants
+        self.max_pace = 100  # In game-length-units per second
+
+        # Only the first n_ants rows are alive
+        self.n_ants = 0
+        for name, (shape, dtype) in self.fields.items():
+            setattr(self, name, self.allocate(name, (capacity, *shape), dtype))
+
+        self.population = AntViews(self)
+        self.world.add_life(self)
+
+    def allocate(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        """Creates the zeroed array of field name"""
+        return np.zeros(shape, dtype=dtype)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+
+    def reserve(self, capacity: int) -> None:
+        """Grows arrays so that they can hold at least capacity ants"""
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, 2*self.capacity)
+        for name, (shape, dtype) in self.fields.items():
+            old = getattr(self, name)
+            new = self.allocate(name, (capacity, *shape), dtype)
+            new[:self.n_ants] = old[:self.n_ants]
+            setattr(self, name, new)
+
+    def populate(self, n_ants: int) -> None:
+        start, end = self.n_ants, self.n_ants + n_ants
+        self.reserve(end)
+
+        # Newborns appear around the nest, see Nest.give_newborn_position
+        theta = 2*math.pi*self.rng.random(n_ants)
+        self.idno[start:end] = np.arange(self.ant_idno+1, self.ant_idno+1+n_ants)
+        self.x[start:end] = self.nest.x + self.nest.radius*np.cos(theta)
+        self.y[start:end] = self.nest.y + self.nest.radius*np.sin(theta)
+        self.o[start:end] = theta
+        self.speed_factor_h[start:end] = 0
+        self.job[start:end] = JOB_CODE[Job.JOBLESS]
+        self.thresholds[start:end] = self.rng.uniform(0.1, 0.5, (n_ants, len(NEEDS)))
+
+        self.world.tau.events.emit(EventKind.BIRTH, self.ant_idno+1, n_ants)
+        self.ant_idno += n_ants
+        self.n_ants = end
+
+    def count_jobs(self) -> dict[Job, int]:
+        counts = np.bincount(self.job[:self.n_ants], minlength=len(JOBS))
+        return {job: int(counts[code]) for job, code in JOB_CODE.items()}
+
+    def allocate_jobs(self) -> None:
+        n = self.n_ants
+        changed = assign_jobs(self.job[:n], self.thresholds[:n], self.needs, self.job_hysteresis)
+        self.wake[changed] = 0
+        self.jobs_allocated(self.job[:n], len(changed))
+
+    def positions(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n = self.n_ants
+        return self.x[:n], self.y[:n], self.o[:n]
+
+    def trails(self) -> np.ndarray:
+        return self.trail[:self.n_ants]
+
+    def columns(self, names: tuple[str, ...] | None=None) -> dict[str, np.ndarray]:
+        n = self.n_ants
+        return {name: getattr(self, name)[:n] for name in names or VectorColony.fields}
+
+    def living_order(self) -> list[int]:
+        """Ants live all at once, in no order"""
+        return []
+
+    def attach(self, columns: dict[str, np.ndarray], living_order: list[int] | None=None) -> None:
+        """Uses columns as ant arrays, without copy, e.g. when memory-mapped from a save file.
+        The colony must have no ant yet"""
+        for name in self.fields:
+            setattr(self, name, columns[name])
+        self.n_ants = len(columns['x'])
+
+    def live(self):
+        n, dt = self.n_ants, self.world.tau.vt_loop_duration
+        awake = self.awake_rows()
+        x, y, o, speed_factor_h = self.x[awake], self.y[awake], self.o[awake], self.speed_factor_h[awake]
+        move_ants(
+            x, y, o, speed_factor_h,
+            jobless=self.job[awake] == JOB_CODE[Job.JOBLESS],
+            dt=dt,
+            max_pace=self.max_pace,
+            world=self.world,
+            nest=self.nest,
+            rng=self.rng
+        )
+        self.x[awake], self.y[awake], self.o[awake], self.speed_factor_h[awake] = x, y, o, speed_factor_h
+        self.steer_foragers(dt)
+        self.react_to_positions()
+        self.lay_trails(dt)
+        self.take_naps()
+
+    def awake_rows(self) -> slice | np.ndarray:
+        """Rows of ants awake: a slice when all are, cheaper than indices"""
+        n = self.n_ants
+        asleep = self.wake[:n] > self.world.tau.scheduler.now
+        if not asleep.any():
+            return slice(0, n)
+        return np.flatnonzero(~asleep)
+
+    def steer_foragers(self, dt: float) -> None:
+        """Batched equivalent of foragers heading for food in sight, or else following trails, in Ant.live"""
+        foraging = np.flatnonzero(self.job[:self.n_ants] == JOB_CODE[Job.FORAGING])
+        if not len(foraging):
+            return
+        x, y, max_turn = self.x[foraging], self.y[foraging], self.max_steering*dt
+        o = self.world.pheromones.steer(x, y, self.o[foraging], max_turn) if self.follow_trails else self.o[foraging]
+        _, food_x, food_y = self.world.nearest_food(x, y)
+        sensing = np.flatnonzero(~np.isnan(food_x[:, 0]))
+        if len(sensing):
+            heading = np.arctan2(y[sensing]-food_y[sensing, 0], x[sensing]-food_x[sensing, 0])
+            o[sensing] = turn_towards(self.o[foraging[sensing]], heading, max_turn)
+        self.o[foraging] = o
+
+    def lay_trails(self, dt: float) -> None:
+        """Batched equivalent of the pheromone deposit in Ant.live"""
+        trailing = np.flatnonzero(self.trail[:self.n_ants] > 0)
+        if len(trailing):
+            self.world.pheromones.deposit(
+                self.x[trailing], self.y[trailing], self.trail_deposit(self.trail[trailing], dt)
+            )
+            self.trail[trailing] -= dt
+
+    def take_naps(self) -> None:
+        """Batched equivalent of the nap at the end of Ant.live"""
+        n, nest, now = self.n_ants, self.nest, self.world.tau.scheduler.now
+        napping = (
+            (self.job[:n] == JOB_CODE[Job.JOBLESS])
+            & ((self.x[:n]-nest.x)**2 + (self.y[:n]-nest.y)**2 < nest.rest_radius**2)
+            & (self.wake[:n] <= now)
+        )
+        self.wake[:n][napping] = now + self.nap_duration
+
+    def react_to_positions(self) -> None:
+        """Batched equivalent of Ant.react_to_position"""
+        n = self.n_ants
+        ant_idx, obj_idx, objects = self.world.index.query_pairs(
+            self.x[:n], self.y[:n], self.world.contact_radius
+        )
+        for k in np.unique(obj_idx):
+            nlo = objects[k]
+            near = np.sort(ant_idx[obj_idx == k])
+
+            if isinstance(nlo, Food):
+                self.eat(near[0], nlo)
+
+    def eat(self, i: int, food: Food) -> None:
+        """Ant of row i found food"""
+        self.world.tau.events.emit(EventKind.FOOD_FOUND, int(self.idno[i]), food.position.x, food.position.y)
+        self.world.remove_object(food)
+        self.trail[i] = self.trail_after(food)
+
+
+class AntViews(Sequence):
+    """Read-only sequence of AntView over the living rows of a VectorColony"""
+    def __init__(self, colony: VectorColony) -> None:
+        self.colony = colony
+
+    def __len__(self) -> int:
+        return self.colony.n_ants
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [AntView(self.colony, j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('ant index out of range')
+        return AntView(self.colony, i)
+
+
+class AntView():
+    """Thin view over one row of a VectorColony. Exposes the same attributes as Ant"""
+    __slots__ = ('colony', 'i')
+
+    def __init__(self, colony: VectorColony, i: int) -> None:
+        self.colony = colony
+        self.i = i
+
+    def __repr__(self):
+        return f'AntView #{self.idno} {self.position}'
+
+    @property
+    def world(self):
+        return self.colony.world
+
+    @property
+    def max_pace(self):
+        return self.colony.max_pace
+
+    @property
+    def idno(self) -> int:
+        return int(self.colony.idno[self.i])
+
+    @property
+    def x(self) -> float:
+        return float(self.colony.x[self.i])
+
+    @property
+    def y(self) -> float:
+        return float(self.colony.y[self.i])
+
+    @property
+    def o(self) -> float:
+        return float(self.colony.o[self.i])
+
+    @property
+    def position(self) -> Position:
+        """Snapshot of the position, changing it does not move the ant"""
+        return Position(self.x, self.y, self.o)
+
+    @property
+    def job(self) -> Job:
+        return JOBS[self.colony.job[self.i]]
+
+    @job.setter
+    def job(self, value: Job):
+        self.colony.job[self.i] = JOB_CODE[value]
+
+    @property
+    def speed_factor_h(self) -> list[float]:
+        return self.colony.speed_factor_h[self.i].tolist()
+
+    @property
+    def thresholds(self) -> tuple[float, ...]:
+        return tuple(self.colony.thresholds[self.i].tolist())
+
+    @property
+    def trail(self) -> float:
+        return float(self.colony.trail[self.i])
+
+    @property
+    def colony_needs_thresholds(self) -> dict:
+        return {need: float(self.colony.thresholds[self.i, col]) for need, col in NEED_COL.items()}
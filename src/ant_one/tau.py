@@ -4,55 +4,220 @@ Its purpose is to:
 - Keep track of play time and real time
 - Handle action progression
 - Manage game speed
+- Own the randomness of the game, so that a run can be replayed from its seed
 
 Name chosen after the greek letter regularly used for time in science.
 """
 
-import asyncio
 import datetime
 import logging
+import secrets
 import time
+import zlib
+
+import numpy as np
+
+from .events import EventLog
+from .random_pool import RandomPool
+from .scheduler import Scheduler
+from .telemetry import Telemetry
 
 
 class Tau():
-    def __init__(self):
-        """Initiates time engine"""
+    def __init__(self, seed: int | None=None, fixed_dt: float | None=None, sim_dt: float=0.03):
+        """Initiates time engine
+        seed: root of all random streams, random if not given
+        fixed_dt: if given, each loop advances by fixed_dt*time_factor virtual seconds
+        instead of following the wall clock
+        sim_dt: virtual seconds per simulation step, whatever the speed of time"""
         # Accessors
         self.world = None
         self.render = None
 
         # Parameters
         self.speeds_of_time = [1, 2, 5, 10, 20]
+        self.sim_dt = sim_dt
+        self.max_fps = 30  # Render cap
+        self.max_substeps = 200  # Per loop. Beyond, virtual time is dropped to let the game catch up
+        self.max_frame_skip = 5  # Consecutive renders that can be skipped when falling behind
 
-        # Core. rt = Real Time. vt = Virtual (game) time
-        self.rt_start = datetime.datetime.now()  
+        # Core. rt = Real Time, in seconds from a monotonic clock. vt = Virtual (game) time
+        self.rt_start = time.perf_counter()
         self.vtime = datetime.datetime(year=1, month=1, day=1)
         self.time_factor = self.speeds_of_time[0]
-        self.loopno = 0
+        self.fixed_dt = fixed_dt
+        self.loopno = 0  # Simulation steps
+        self.frameno = 0  # Rendered frames
+        self.skipped_frames = 0
+        self.rt_render_duration = 0
+        self.rt_frame_duration = 0  # Between the last two rendered frames
+        self.rt_last_frame = self.rt_start
+        self.fast_forwarding = False  # Set by advance(), pauses pacing and rendering
+
+        # Instrumentation
+        self.telemetry = Telemetry()
+        self.events = EventLog(self)
+        self.recorders = []  # Called after each tick, e.g. TrajectoryRecorder
+
+        # Timed processes and sleeping entities
+        self.scheduler = Scheduler()
+
+        # Randomness
+        self.seed = seed if seed is not None else secrets.randbits(64)
+        logging.info(f'Time engine seeded with {self.seed}')
 
     async def event_loop_manager(self):
-        """Manages the event loop"""
-        self.rt_loop_starttime = datetime.datetime.now()
+        """Manages the event loop.
+        Each loop runs as many sim_dt steps as the virtual time elapsed requires,
+        then renders unless the loop already overran its frame budget"""
+        import asyncio  # Only the interactive game needs it, headless runs stay light
+
+        rt_loop_starttime = time.perf_counter()
+        vt_debt = 0  # Virtual time elapsed but not simulated yet
+        frames_skipped = 0
         while True:
             # Loop data
-            self.loopno += 1
-            rt_now = datetime.datetime.now()
-            self.rt_loop_duration = rt_now - self.rt_loop_starttime
-            self.rt_loop_starttime = rt_now
-            self.game_duration = (rt_now - self.rt_start).total_seconds()
+            rt_now = time.perf_counter()
+            self.rt_loop_duration = rt_now - rt_loop_starttime
+            rt_loop_starttime = rt_now
+            self.game_duration = rt_now - self.rt_start
+            frame_budget = 1/self.max_fps
 
-            self.vt_loop_duration = self.time_factor * self.rt_loop_duration
-            self.vtime += self.vt_loop_duration
-            self.vt_loop_duration = self.vt_loop_duration.total_seconds()
+            if self.fast_forwarding:
+                # advance() runs the simulation, the loop only waits for it to end
+                await asyncio.sleep(frame_budget)
+                continue
 
-            for obj in self.world.living_objects:
-                obj.live()
+            # Simulation
+            if self.fixed_dt is None:
+                vt_debt += self.time_factor * self.rt_loop_duration
+            else:
+                vt_debt += self.time_factor * self.fixed_dt
+            n_substeps = min(int(vt_debt / self.sim_dt), self.max_substeps)
+            vt_debt = min(vt_debt - n_substeps*self.sim_dt, self.sim_dt)
+            for _ in range(n_substeps):
+                self.tick(self.sim_dt)
+            self.events.dispatch()
+
+            # Rendering
+            rt_sim_duration = time.perf_counter() - rt_now
+            self.telemetry.record('sim', rt_sim_duration)
+            if rt_sim_duration + self.rt_render_duration > frame_budget and frames_skipped < self.max_frame_skip:
+                # Behind schedule: catch up with the simulation first
+                frames_skipped += 1
+                self.skipped_frames += 1
+                await asyncio.sleep(0)
+                continue
+            rt_render_start = time.perf_counter()
+            self.rt_frame_duration = rt_render_start - self.rt_last_frame
+            self.rt_last_frame = rt_render_start
             self.render()
-            
-            await asyncio.sleep(0.03)
+            self.frameno += 1
+            self.rt_render_duration = time.perf_counter() - rt_render_start
+            self.telemetry.record('render', self.rt_render_duration)
+            frames_skipped = 0
+
+            rt_sleep_start = time.perf_counter()
+            await asyncio.sleep(max(0, frame_budget - (rt_sleep_start - rt_now)))
+            rt_frame_end = time.perf_counter()
+            self.telemetry.record('sleep', rt_frame_end - rt_sleep_start)
+            self.telemetry.record('frame', rt_frame_end - rt_now)
+    
+    def tick(self, vt_loop_duration: float) -> None:
+        """Advances the game by one step of vt_loop_duration virtual seconds"""
+        self.loopno += 1
+        self.vt_loop_duration = vt_loop_duration
+        self.vtime += datetime.timedelta(seconds=vt_loop_duration)
+
+        # Living objects may fall asleep or wake up while living: iterate over a snapshot
+        self.telemetry.tick_start()
+        if not self.telemetry.enabled:
+            self.scheduler.advance(vt_loop_duration)
+            for obj in tuple(self.world.living_objects):
+                obj.live()
+            for recorder in self.recorders:
+                recorder.record()
+            self.telemetry.tick_done()
+            return
+
+        # Same loop, timed by runs of objects of the same type
+        rt_tick_start = time.perf_counter()
+        self.scheduler.advance(vt_loop_duration)
+        rt_run_start = time.perf_counter()
+        self.telemetry.record('timers', rt_run_start - rt_tick_start)
+        run_type = None
+        durations = {}
+        for obj in tuple(self.world.living_objects):
+            if type(obj) is not run_type:
+                rt_now = time.perf_counter()
+                if run_type is not None:
+                    durations[run_type] = durations.get(run_type, 0) + rt_now - rt_run_start
+                run_type, rt_run_start = type(obj), rt_now
+            obj.live()
+        rt_now = time.perf_counter()
+        if run_type is not None:
+            durations[run_type] = durations.get(run_type, 0) + rt_now - rt_run_start
+
+        for obj_type, duration in durations.items():
+            self.telemetry.record(f'live:{obj_type.__name__}', duration)
+        self.telemetry.record('tick', rt_now - rt_tick_start)
+        if self.recorders:
+            for recorder in self.recorders:
+                recorder.record()
+            self.telemetry.record('record', time.perf_counter() - rt_now)
+        self.telemetry.tick_done()
+    
+    async def advance(self, virtual: datetime.timedelta, on_progress=None, yield_every: float=0.05) -> None:
+        """Fast-forwards the game by virtual time, in sim_dt steps run as fast as possible.
+        Normal pacing and rendering are suspended until done.
+        Every yield_every real seconds, lets the event loop run (UI, events) and calls
+        on_progress(fraction done) if given"""
+        import asyncio
+
+        if self.fast_forwarding:
+            raise RuntimeError('Already fast-forwarding')
+        n_ticks = round(virtual.total_seconds() / self.sim_dt)
+        self.fast_forwarding = True
+        try:
+            rt_yield = time.perf_counter()
+            for tickno in range(1, n_ticks+1):
+                self.tick(self.sim_dt)
+                if time.perf_counter() - rt_yield >= yield_every:
+                    self.events.dispatch()
+                    if on_progress is not None:
+                        on_progress(tickno / n_ticks)
+                    await asyncio.sleep(0)
+                    rt_yield = time.perf_counter()
+        finally:
+            self.fast_forwarding = False
+            self.events.dispatch()
+        if on_progress is not None:
+            on_progress(1)
+
+    def run(self, n_ticks: int) -> None:
+        """Advances the game by n_ticks sim_dt steps, as fast as possible and without rendering"""
+        for _ in range(n_ticks):
+            self.tick(self.sim_dt)
+            self.events.dispatch()
+    
+    def random_stream(self, name: str) -> RandomPool:
+        """Returns an independent random stream for the subsystem called name, for draws one at a time.
+        Same seed and name give the same sequence"""
+        return RandomPool(self.seed_sequence(f'pool/{name}'))
+    
+    def np_random_stream(self, name: str) -> np.random.Generator:
+        """Same as random_stream, for batched draws with NumPy"""
+        return np.random.default_rng(self.seed_sequence(name))
+
+    def seed_sequence(self, name: str) -> np.random.SeedSequence:
+        return np.random.SeedSequence(self.seed, spawn_key=(zlib.crc32(name.encode()),))
     
     def add_world(self, world):
         self.world = world
     
     def add_render(self, render):
         self.render = render
+
+    def add_recorder(self, recorder):
+        """Calls recorder.record() after each tick, until the recorder is closed"""
+        self.recorders.append(recorder)
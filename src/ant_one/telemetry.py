@@ -0,0 +1,114 @@
+"""
+Telemetry of Ant One's time engine.
+Its purpose is to:
+- Record how long each phase of a tick or frame takes (live per object type, render, sleep)
+- Keep the last durations of each phase in fixed-size ring buffers, for p50/p95/p99
+- Capture a cProfile of a window of ticks on demand
+
+Recording a duration is a few list operations, so telemetry can stay on all the time.
+"""
+
+import io
+import json
+
+
+class RingStats():
+    """Last n values of a measure, in a preallocated ring buffer"""
+    def __init__(self, size: int=512) -> None:
+        self.values = [0.0] * size
+        self.idx = 0  # Next slot to write
+        self.count = 0  # Values recorded since start
+
+    def add(self, value: float) -> None:
+        self.values[self.idx] = value
+        self.idx = (self.idx + 1) % len(self.values)
+        self.count += 1
+
+    def percentiles(self, *qs: float) -> list[float]:
+        """Nearest-rank percentiles of the values currently held, qs in [0, 100]"""
+        held = sorted(self.values[:min(self.count, len(self.values))])
+        if not held:
+            return [0.0 for _ in qs]
+        return [held[min(len(held)-1, int(q/100 * len(held)))] for q in qs]
+
+    def summary(self) -> dict:
+        p50, p95, p99 = self.percentiles(50, 95, 99)
+        held = self.values[:min(self.count, len(self.values))]
+        return {
+            'n': self.count,
+            'mean': sum(held)/len(held) if held else 0.0,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99,
+        }
+
+
+class Telemetry():
+    """Durations in seconds of Tau phases, by phase name
+    Phases: tick, live:<object type>, sim (all ticks of a frame), render, sleep, frame"""
+    def __init__(self, size: int=512) -> None:
+        self.size = size
+        self.enabled = True
+        self.phases = {}
+
+        # Profiling
+        self.profiler = None
+        self.profile_ticks_left = 0
+        self.profile_path = None
+        self.profile_report = None  # Text report of the last capture
+
+    def record(self, phase: str, duration: float) -> None:
+        try:
+            self.phases[phase].add(duration)
+        except KeyError:
+            self.phases[phase] = RingStats(self.size)
+            self.phases[phase].add(duration)
+
+    def summary(self) -> dict[str, dict]:
+        return {phase: stats.summary() for phase, stats in sorted(self.phases.items())}
+
+    def report(self) -> str:
+        """Human readable table of the summary, in milliseconds"""
+        lines = [f'{"phase":<24}{"n":>8}{"mean":>10}{"p50":>10}{"p95":>10}{"p99":>10}']
+        for phase, s in self.summary().items():
+            lines.append(
+                f'{phase:<24}{s["n"]:>8}' + ''.join(f'{s[k]*1000:>10.3f}' for k in ('mean', 'p50', 'p95', 'p99'))
+            )
+        return '\n'.join(lines)
+
+    def dump(self, path) -> None:
+        """Writes the summary as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    # Profiling
+    def profile(self, n_ticks: int, path=None) -> None:
+        """Profiles the next n_ticks ticks, whether telemetry is enabled or not. The report is kept in
+        profile_report, and raw stats are written to path if given (for snakeviz, pstats...)"""
+        self.profile_ticks_left = n_ticks
+        self.profile_path = path
+
+    def tick_start(self) -> None:
+        """Called by Tau before each tick"""
+        if self.profile_ticks_left <= 0 or self.profiler is not None:
+            return
+        import cProfile  # Only loaded when profiling, like pstats
+
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def tick_done(self) -> None:
+        """Called by Tau after each tick"""
+        if self.profiler is None:
+            return
+        self.profile_ticks_left -= 1
+        if self.profile_ticks_left <= 0:
+            self.profiler.disable()
+            if self.profile_path is not None:
+                self.profiler.dump_stats(self.profile_path)
+            import pstats
+
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(25)
+            self.profile_report = out.getvalue()
+            self.profiler = None
@@ -1,16 +1,38 @@
+"""
+User settings of Ant One, persisted as a small versioned JSON file.
+save() only schedules a write: changes made in a burst (slider moves, keystrokes)
+are written once, after save_delay seconds, by a writer thread rather than the UI.
+One writer thread serves all saves, and what is pending at exit is written then.
+Writes go to a temporary file swapped in at once, so a crash never leaves half a file.
+"""
+
+import atexit
+import json
+import logging
+import os
 import pickle
+import threading
+import time
 from pathlib import Path
 
+
 class UserSettings:
+    version = 1
+    fields = ('name', 'pimp_color_antennae', 'pimp_color_body', 'pimp_color_legs')
 
     # Original settings
-    def __init__(self, settings_path):
+    def __init__(self, settings_path, save_delay: float=0.5):
         self._name = 'Pretty Oecophylla Smaragdina'
         self._pimp_color_antennae = '#393A3E'
         self._pimp_color_body = '#393A3E'
         self._pimp_color_legs = '#393A3E'
 
-        self.settings_path = settings_path
+        self.settings_path = Path(settings_path)
+        self.save_delay = save_delay
+        self._due = None  # time.monotonic() of the pending write
+        self._pending = threading.Condition()  # Guards _due, wakes the writer up
+        self._writer = None  # Started by the first save
+        self._write_lock = threading.Lock()  # One write at a time, without blocking save()
         self.load()
     
     # Getters and setters
@@ -47,13 +69,88 @@ class UserSettings:
         self._pimp_color_legs = value
     
     # Save and load
+    def to_dict(self) -> dict:
+        return {'version': self.version, **{field: getattr(self, field) for field in self.fields}}
+
     def save(self):
-        self.settings_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.settings_path, 'wb') as sf:
-            pickle.dump(self, sf)
-    
+        """Schedules a write in save_delay seconds. Calls within the delay are coalesced"""
+        with self._pending:
+            self._due = time.monotonic() + self.save_delay
+            if self._writer is None:
+                self._writer = threading.Thread(target=self.write_when_due, name='settings writer', daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)  # The daemon writer is not waited for
+            self._pending.notify()
+
+    def flush(self):
+        """Writes settings now if a write is pending"""
+        with self._pending:
+            if self._due is None:
+                return
+            self._due = None
+            settings = self.to_dict()
+        self.write(settings)
+
+    def write_when_due(self):
+        """Writer thread: waits for a save, then for its delay to pass"""
+        while True:
+            with self._pending:
+                while self._due is None or self._due > time.monotonic():
+                    self._pending.wait(None if self._due is None else self._due - time.monotonic())
+                self._due = None
+                settings = self.to_dict()
+            try:
+                self.write(settings)
+            except OSError as error:
+                logging.warning(f'User settings not saved: {error}')
+
+    def write(self, settings: dict):
+        with self._write_lock:
+            self.settings_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.settings_path.with_name(self.settings_path.name + '.tmp')
+            with open(tmp_path, 'w') as sf:
+                json.dump(settings, sf)
+                sf.flush()
+                os.fsync(sf.fileno())
+            os.replace(tmp_path, self.settings_path)
+
     def load(self):
         if self.settings_path.exists():
-            with open(self.settings_path, 'rb') as sf:
-                fetched_settings = pickle.load(sf)
-            self.__dict__.update(fetched_settings.__dict__)
+            try:
+                with open(self.settings_path) as sf:
+                    fetched_settings = json.load(sf)
+            except (OSError, ValueError) as error:  # ValueError covers JSON and Unicode decoding
+                logging.warning(f'Ignored unreadable user settings {self.settings_path}: {error}')
+                return
+            if not isinstance(fetched_settings, dict):
+                logging.warning(f'Ignored user settings {self.settings_path}: not a JSON object')
+                return
+            if fetched_settings.get('version') != self.version:
+                logging.warning(f'Ignored user settings of version {fetched_settings.get("version")}')
+                return
+        elif self.legacy_path.exists():
+            try:
+                fetched_settings = self.load_legacy()
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError,
+                    TypeError, ValueError) as error:
+                logging.warning(f'Ignored unreadable user settings {self.legacy_path}: {error!r}')
+                return
+        else:
+            return
+        for field in self.fields:
+            if field in fetched_settings:
+                setattr(self, field, fetched_settings[field])
+        if not self.settings_path.exists():
+            self.write(self.to_dict())  # Migration done once
+
+    # Settings saved as a pickled UserSettings by earlier versions
+    @property
+    def legacy_path(self) -> Path:
+        return self.settings_path.with_suffix('.pkl')
+
+    def load_legacy(self) -> dict:
+        with open(self.legacy_path, 'rb') as sf:
+            fetched_settings = pickle.load(sf)
+        logging.info(f'User settings migrated from {self.legacy_path}')
+        return {field: fetched_settings.__dict__[f'_{field}'] for field in self.fields
+                if f'_{field}' in fetched_settings.__dict__}
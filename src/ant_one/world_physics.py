@@ -1,16 +1,24 @@
 
+import functools
 import math
 
+import numpy as np
+
 
 class Length(float):
     """Defines a length in the World"""
-    def __init__(self, x):
-        self.x = x
+    __slots__ = ()
+
+    @property
+    def x(self):
+        return float(self)
 
 
 class Position():
     """Defines a position in the World.
     May also define orientation of a body (designed for ants representation)"""
+    __slots__ = ('x', 'y', 'orientation')
+
     def __init__(self, x, y, orientation=0):
         self.x = x
         self.y = y
@@ -27,6 +35,343 @@ class Position():
     def __repr__(self):
         return f'Position (X={self.x:.0f}, Y={self.y:.0f}, o={self.o:.2f})'
 
+    def move_to(self, x, y, orientation) -> None:
+        """Updates the position in place"""
+        self.x = x
+        self.y = y
+        self.orientation = orientation
+
     def distance_from(self, other_pos: 'Position') -> float:
         """Returns euclidean distance"""
         return math.sqrt((other_pos.x-self.x)**2 + (other_pos.y-self.y)**2)
+
+
+class SpatialHash():
+    """Uniform grid indexing static objects that have a position, for proximity queries.
+    size: World size (width, height), objects outside are kept in border cells
+    cell_size: side of a cell in game units, best close to the usual query radius"""
+    def __init__(self, size: tuple[int, int], cell_size: float) -> None:
+        self.cell_size = cell_size
+        self.n_cols = max(1, math.ceil(size[0]/cell_size))
+        self.n_rows = max(1, math.ceil(size[1]/cell_size))
+
+        self.cells = {}  # Cell key -> objects in cell
+        self.keys = {}  # id(object) -> cell key
+        self._packed = None  # Cache of sorted arrays for batched queries
+    
+    def __len__(self):
+        return len(self.keys)
+    
+    def __contains__(self, obj):
+        return id(obj) in self.keys
+    
+    def cell_of(self, x: float, y: float) -> tuple[int, int]:
+        col = min(max(int(x // self.cell_size), 0), self.n_cols-1)
+        row = min(max(int(y // self.cell_size), 0), self.n_rows-1)
+        return col, row
+    
+    def insert(self, obj) -> None:
+        col, row = self.cell_of(obj.position.x, obj.position.y)
+        key = row*self.n_cols + col
+        self.cells.setdefault(key, []).append(obj)
+        self.keys[id(obj)] = key
+        self._packed = None
+    
+    def remove(self, obj) -> None:
+        key = self.keys.pop(id(obj))
+        cell = self.cells[key]
+        cell.remove(obj)
+        if not cell:
+            del self.cells[key]
+        self._packed = None
+    
+    def query(self, position: Position, radius: float) -> list:
+        """Returns objects strictly closer than radius from position"""
+        min_col, min_row = self.cell_of(position.x-radius, position.y-radius)
+        max_col, max_row = self.cell_of(position.x+radius, position.y+radius)
+        found = []
+        for row in range(min_row, max_row+1):
+            for col in range(min_col, max_col+1):
+                for obj in self.cells.get(row*self.n_cols + col, ()):
+                    if position.distance_from(obj.position) < radius:
+                        found.append(obj)
+        return found
+    
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> list:
+        """Returns objects within x0 <= x <= x1 and y0 <= y <= y1"""
+        min_col, min_row = self.cell_of(x0, y0)
+        max_col, max_row = self.cell_of(x1, y1)
+        if (max_col-min_col+1) * (max_row-min_row+1) <= len(self.cells):
+            cells = (
+                self.cells.get(row*self.n_cols + col, ())
+                for row in range(min_row, max_row+1) for col in range(min_col, max_col+1)
+            )
+        else:  # Large rectangle: cheaper to go through occupied cells
+            cells = (
+                cell for key, cell in self.cells.items()
+                if min_col <= key % self.n_cols <= max_col and min_row <= key // self.n_cols <= max_row
+            )
+        return [
+            obj for cell in cells for obj in cell
+            if x0 <= obj.position.x <= x1 and y0 <= obj.position.y <= y1
+        ]
+
+    def query_pairs(self, xs, ys, radius: float) -> tuple['np.ndarray', 'np.ndarray', list]:
+        """Batched query for many points at once
+        xs, ys: arrays of coordinates (e.g. ant positions)
+        Returns (point indices, object indices, objects), where pairs
+        (points[i], objects[j]) are strictly closer than radius"""
+        cell_starts, cell_counts, obj_x, obj_y, objects = self._pack()
+        empty = np.zeros(0, dtype=np.intp)
+        if not objects or not len(xs):
+            return empty, empty, objects
+
+        point_idx, obj_idx = cell_candidates(
+            cell_starts, cell_counts, xs, ys, self.cell_size, self.n_cols, self.n_rows, math.ceil(radius/self.cell_size)
+        )
+        close = (xs[point_idx]-obj_x[obj_idx])**2 + (ys[point_idx]-obj_y[obj_idx])**2 < radius**2
+        return point_idx[close], obj_idx[close], objects
+    
+    def _pack(self):
+        """Flattens the grid into arrays sorted by cell key, kept until next change.
+        cell_starts and cell_counts locate the objects of every cell in these arrays"""
+        if self._packed is None:
+            keys = sorted(self.cells)
+            objects = [obj for key in keys for obj in self.cells[key]]
+            cell_counts = np.zeros(self.n_cols*self.n_rows, dtype=np.intp)
+            cell_counts[keys] = [len(self.cells[key]) for key in keys]
+            self._packed = (
+                np.cumsum(cell_counts) - cell_counts,
+                cell_counts,
+                np.array([obj.position.x for obj in objects], dtype=float),
+                np.array([obj.position.y for obj in objects], dtype=float),
+                objects
+            )
+        return self._packed
+
+
+def turn_towards(o: np.ndarray, heading: np.ndarray, max_turn: float) -> np.ndarray:
+    """Orientations o turned by at most max_turn radians towards heading, the shortest way"""
+    turn = heading - o
+    turn -= 2*math.pi*np.round(turn/(2*math.pi))
+    return o + np.clip(turn, -max_turn, max_turn)
+
+
+def cell_candidates(cell_starts, cell_counts, xs, ys, cell_size: float, n_cols: int, n_rows: int,
+                    reach: int, inner: int=0) -> tuple[np.ndarray, np.ndarray]:
+    """Pairs (point index, object index) of points xs, ys and objects packed by cell
+    in cells from inner to reach cells away, see SpatialHash._pack"""
+    cols = np.clip((xs // cell_size).astype(np.intp), 0, n_cols-1)
+    rows = np.clip((ys // cell_size).astype(np.intp), 0, n_rows-1)
+    point_idx, obj_idx = [np.zeros(0, dtype=np.intp)], [np.zeros(0, dtype=np.intp)]
+    for d_row in range(-reach, reach+1):
+        for d_col in range(-reach, reach+1):
+            if max(abs(d_row), abs(d_col)) < inner:
+                continue
+            nb_cols, nb_rows = cols+d_col, rows+d_row
+            valid = np.flatnonzero(
+                (nb_cols >= 0) & (nb_cols < n_cols) & (nb_rows >= 0) & (nb_rows < n_rows)
+            )
+            cell_keys = nb_rows[valid]*n_cols + nb_cols[valid]
+            starts = cell_starts[cell_keys]
+            counts = cell_counts[cell_keys]
+            hit = counts > 0
+            valid, starts, counts = valid[hit], starts[hit], counts[hit]
+            if not len(valid):
+                continue
+            # Expand every point to all objects of its neighbour cell
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts)-counts, counts)
+            point_idx.append(np.repeat(valid, counts))
+            obj_idx.append(np.repeat(starts, counts) + offsets)
+    return np.concatenate(point_idx), np.concatenate(obj_idx)
+
+
+class NearestIndex():
+    """Static objects that have a position, for nearest neighbour queries of many points at once.
+    Objects are packed in arrays sorted by grid cell, so that a query only looks at cells within reach.
+    Queries search rings of cells outwards and stop, point by point, once the nearest objects found
+    are closer than any ring left: dense objects cost few cells, sparse ones few objects.
+    Changes are patched in rather than repacked: inserted objects wait in a pending list,
+    removed ones are masked. Arrays are repacked at next query once patches exceed
+    rebuild_ratio of the packed objects, and min_rebuild.
+    size: World size (width, height), objects outside are kept in border cells
+    cell_size: side of a cell in game units, best a fraction of the usual query radius"""
+    def __init__(self, size: tuple[int, int], cell_size: float, rebuild_ratio: float=0.25,
+                 min_rebuild: int=16) -> None:
+        self.cell_size = cell_size
+        self.n_cols = max(1, math.ceil(size[0]/cell_size))
+        self.n_rows = max(1, math.ceil(size[1]/cell_size))
+        self.rebuild_ratio = rebuild_ratio
+        self.min_rebuild = min_rebuild
+
+        self.pending = []  # Inserted since last pack
+        self.n_removed = 0  # Masked since last pack
+        self.packs = 0  # Number of times arrays were packed
+        self.pack([])
+
+    def __len__(self):
+        return len(self.objects) - self.n_removed + len(self.pending)
+
+    def insert(self, obj) -> None:
+        self.pending.append(obj)
+
+    def remove(self, obj) -> None:
+        slot = self.slots.get(id(obj))
+        if slot is None or not self.alive[slot]:  # Not packed, or an id reused after removal
+            self.pending.remove(obj)
+            return
+        self.alive[slot] = False
+        self.n_removed += 1
+        key = self.keys[slot]
+        cell = [entry for entry in self.cells[key] if entry[0] != slot]
+        if cell:
+            self.cells[key] = cell
+        else:
+            del self.cells[key]
+
+    def pack(self, objects: list) -> None:
+        x = np.array([obj.position.x for obj in objects], dtype=float)
+        y = np.array([obj.position.y for obj in objects], dtype=float)
+        cols = np.clip((x // self.cell_size).astype(np.intp), 0, self.n_cols-1)
+        rows = np.clip((y // self.cell_size).astype(np.intp), 0, self.n_rows-1)
+        keys = rows*self.n_cols + cols
+        order = np.argsort(keys, kind='stable')
+
+        self.objects = [objects[i] for i in order.tolist()]
+        self.x, self.y = x[order], y[order]
+        self.alive = np.ones(len(objects), dtype=bool)
+        self.slots = {id(obj): i for i, obj in enumerate(self.objects)}
+        self.cell_counts = np.bincount(keys, minlength=self.n_cols*self.n_rows)
+        self.cell_starts = np.cumsum(self.cell_counts) - self.cell_counts
+        # Same, as Python objects for nearest_one, where NumPy scalars would cost more than the search:
+        # occupied cell key -> [(slot, x, y) of alive objects]
+        self.keys = keys[order].tolist()
+        self.cells = {}
+        for slot, (key, obj_x, obj_y) in enumerate(zip(self.keys, self.x.tolist(), self.y.tolist())):
+            self.cells.setdefault(key, []).append((slot, obj_x, obj_y))
+        self.pending = []
+        self.n_removed = 0
+        self.packs += 1
+
+    def repack_if_stale(self) -> None:
+        if len(self.pending) + self.n_removed > max(self.min_rebuild, self.rebuild_ratio*len(self.objects)):
+            self.pack([obj for obj, alive in zip(self.objects, self.alive.tolist()) if alive] + self.pending)
+
+    def nearest(self, xs, ys, radius: float, k: int=1) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Batched k nearest objects strictly closer than radius, for points xs, ys.
+        Returns distances, x and y of objects, each (len(xs), k) and nearest first.
+        Where fewer than k objects are close, distances are inf and coordinates nan"""
+        self.repack_if_stale()
+        xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+        n = len(xs)
+        best = (np.full((n, k), float(radius)**2), np.full((n, k), np.nan), np.full((n, k), np.nan))  # Squared distances, x, y
+
+        if self.pending:  # Few by design: checked against every point
+            pending_x = np.array([obj.position.x for obj in self.pending])
+            pending_y = np.array([obj.position.y for obj in self.pending])
+            self.keep_nearest(best, xs, ys, np.repeat(np.arange(n), len(self.pending)),
+                              np.tile(pending_x, n), np.tile(pending_y, n))
+
+        active = np.arange(n)
+        for ring in range(math.ceil(radius/self.cell_size) + 1):
+            point_idx, obj_idx = cell_candidates(
+                self.cell_starts, self.cell_counts, xs[active], ys[active], self.cell_size,
+                self.n_cols, self.n_rows, reach=ring, inner=ring
+            )
+            if self.n_removed:
+                alive = self.alive[obj_idx]
+                point_idx, obj_idx = point_idx[alive], obj_idx[alive]
+            self.keep_nearest(best, xs, ys, active[point_idx], self.x[obj_idx], self.y[obj_idx])
+            # Objects of rings further out are at least ring cells away
+            active = active[best[0][active, k-1] >= (ring*self.cell_size)**2]
+            if not len(active):
+                break
+
+        distances2, found_x, found_y = best
+        distances = np.where(np.isnan(found_x), np.inf, np.sqrt(distances2))
+        return distances, found_x, found_y
+
+    @staticmethod
+    def keep_nearest(best: tuple, xs, ys, point_idx, obj_x, obj_y) -> None:
+        """Merges candidates (point index, x, y of object) into best, the k nearest of each point so far"""
+        distances2 = (xs[point_idx]-obj_x)**2 + (ys[point_idx]-obj_y)**2
+        better = distances2 < best[0][point_idx, -1]
+        if not better.any():
+            return
+        point_idx, distances2, obj_x, obj_y = point_idx[better], distances2[better], obj_x[better], obj_y[better]
+
+        # Rank candidates with the current best of their points, keep the first k
+        points = np.unique(point_idx)
+        k = best[0].shape[1]
+        point_idx = np.concatenate([np.repeat(points, k), point_idx])
+        columns = [
+            np.concatenate([current[points].ravel(), candidates])
+            for current, candidates in zip(best, (distances2, obj_x, obj_y))
+        ]
+        order = np.lexsort((columns[0], point_idx))
+        point_idx = point_idx[order]
+        group_start = np.flatnonzero(np.r_[True, point_idx[1:] != point_idx[:-1]])
+        rank = np.arange(len(order)) - np.repeat(group_start, np.diff(np.r_[group_start, len(order)]))
+        kept = rank < k
+        for current, column in zip(best, columns):
+            current[point_idx[kept], rank[kept]] = column[order[kept]]
+
+    def nearest_one(self, x: float, y: float, radius: float) -> tuple[float, float, float] | None:
+        """Scalar nearest(), with k=1. Returns distance, x and y of the object, None if none is close"""
+        if not len(self):
+            return None
+        self.repack_if_stale()
+        best = None
+        best_distance2 = radius**2
+        n_rings = math.ceil(radius/self.cell_size) + 1
+        if len(self.keys) - self.n_removed <= (2*n_rings-1)**2:
+            # Fewer objects than cells within reach: look at them all
+            for cell in self.cells.values():
+                for _, obj_x, obj_y in cell:
+                    distance2 = (obj_x-x)**2 + (obj_y-y)**2
+                    if distance2 < best_distance2:
+                        best, best_distance2 = (obj_x, obj_y), distance2
+        else:
+            cells, n_cols, n_rows = self.cells, self.n_cols, self.n_rows
+            col = min(max(int(x // self.cell_size), 0), n_cols-1)
+            row = min(max(int(y // self.cell_size), 0), n_rows-1)
+            key = row*n_cols + col
+            inside = n_rings <= col < n_cols-n_rings and n_rings <= row < n_rows-n_rings
+            for ring in range(n_rings):
+                if inside:  # Most queries: no bound to check
+                    ring_cells = [cells.get(key + d_key) for d_key in self.ring_keys(ring, n_cols)]
+                else:
+                    ring_cells = [
+                        cells.get(key + d_row*n_cols + d_col) for d_row, d_col in self.ring_offsets(ring)
+                        if 0 <= row+d_row < n_rows and 0 <= col+d_col < n_cols
+                    ]
+                for cell in ring_cells:
+                    if cell is not None:
+                        for _, obj_x, obj_y in cell:
+                            distance2 = (obj_x-x)**2 + (obj_y-y)**2
+                            if distance2 < best_distance2:
+                                best, best_distance2 = (obj_x, obj_y), distance2
+                if best_distance2 < (ring*self.cell_size)**2:  # Further rings are at least that far
+                    break
+        for obj in self.pending:
+            distance2 = (obj.position.x-x)**2 + (obj.position.y-y)**2
+            if distance2 < best_distance2:
+                best, best_distance2 = (obj.position.x, obj.position.y), distance2
+        if best is None:
+            return None
+        return math.sqrt(best_distance2), best[0], best[1]
+
+    @staticmethod
+    @functools.cache
+    def ring_offsets(ring: int) -> tuple[tuple[int, int], ...]:
+        """(row, column) offsets of the cells ring cells away from a cell"""
+        return tuple(
+            (d_row, d_col) for d_row in range(-ring, ring+1) for d_col in range(-ring, ring+1)
+            if max(abs(d_row), abs(d_col)) == ring
+        )
+
+    @staticmethod
+    @functools.cache
+    def ring_keys(ring: int, n_cols: int) -> tuple[int, ...]:
+        """Cell key offsets of ring_offsets, in a grid of n_cols columns"""
+        return tuple(d_row*n_cols + d_col for d_row, d_col in NearestIndex.ring_offsets(ring))
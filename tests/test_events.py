@@ -0,0 +1,28 @@
+import logging
+
+from ant_one.events import EventKind, EventLog, format_event
+from ant_one.game_resources import Colony, create_game
+from ant_one.tau import Tau
+
+
+def test_ring_buffer_keeps_last_events():
+    log = EventLog(Tau(), size=4)
+    for idno in range(6):
+        log.emit(EventKind.BIRTH, idno, 1)
+    events, cursor, dropped = log.drain(0)
+    assert [event[2] for event in events] == [2, 3, 4, 5]
+    assert (cursor, dropped) == (6, 2)
+    assert log.drain(cursor) == ([], 6, 0)
+    assert format_event(events[0]) == '[0] Ant #2 born'
+
+
+def test_subscribers_get_events_between_ticks(caplog):
+    tau = Tau(seed=1)
+    received = []
+    tau.events.subscribe(received.extend, kinds={EventKind.BIRTH}, replay=True)
+    create_game(tau, px_size=(1000, 600), n_ants=3, colony_cls=Colony)
+    assert received == []  # Nothing is handed over during a tick
+    with caplog.at_level(logging.INFO):
+        tau.run(1)
+    assert [event[2] for event in received] == [1, 2, 3]
+    assert 'born' not in caplog.text  # Not formatted unless a subscriber does it
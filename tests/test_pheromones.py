@@ -0,0 +1,31 @@
+import math
+
+import numpy as np
+import pytest
+
+from ant_one.game_resources import World
+from ant_one.tau import Tau
+
+
+@pytest.fixture
+def field():
+    return World(Tau(seed=1), px_size=(1000, 600)).pheromones
+
+
+def test_deposits_diffuse_and_evaporate(field):
+    field.deposit(np.array([505.0, 505.0]), np.array([305.0, 305.0]), 1.0)
+    assert field.grid.sum() == 0  # Until next update
+    field.update(field.period)
+    row, col = field.cell(505, 305)
+    assert 0 < field.grid[row, col+1] < field.grid[row, col] < 2
+    assert field.grid.sum() == pytest.approx(2*math.exp(-field.evaporation*field.period))
+
+
+def test_ants_turn_up_the_gradient(field):
+    field.deposit(np.array([600.0]), np.array([300.0]), 10.0)
+    field.update(field.period)
+    # Ant west of the mark heading west (o=0 moves towards -x) turns back east
+    o = field.steer(np.array([592.0]), np.array([300.0]), np.array([0.0]), max_turn=0.1)
+    assert abs(o[0]) == pytest.approx(0.1)
+    assert field.steer_one(592, 300, 0.0, 0.1) == pytest.approx(o[0])
+    assert field.steer_one(100, 100, 0.0, 0.1) == 0  # No trail around
@@ -0,0 +1,26 @@
+import numpy as np
+
+from ant_one.random_pool import RandomPool
+
+
+def test_state_restores_the_sequence_across_blocks():
+    pool = RandomPool(np.random.SeedSequence(7), block_size=16)
+    for _ in range(21):
+        pool.random()
+    pool.gauss(0, 6)
+    state = pool.getstate()
+    expected = [(pool.random(), pool.gauss(), pool.randint(1, 6)) for _ in range(40)]
+
+    restored = RandomPool(np.random.SeedSequence(8), block_size=16)
+    restored.setstate(state)
+    assert [(restored.random(), restored.gauss(), restored.randint(1, 6)) for _ in range(40)] == expected
+
+
+def test_distributions():
+    pool = RandomPool(np.random.SeedSequence(0))
+    uniforms = np.array([pool.uniform(2, 4) for _ in range(20000)])
+    normals = np.array([pool.gauss(1, 3) for _ in range(20000)])
+    dice = np.array([pool.randint(1, 6) for _ in range(20000)])
+    assert 2 <= uniforms.min() and uniforms.max() < 4 and abs(uniforms.mean() - 3) < 0.02
+    assert abs(normals.mean() - 1) < 0.1 and abs(normals.std() - 3) < 0.1
+    assert set(dice) == {1, 2, 3, 4, 5, 6}
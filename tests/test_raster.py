@@ -0,0 +1,36 @@
+import logging
+import zlib
+
+import numpy as np
+
+from ant_one.game_resources import create_game
+from ant_one.raster import RasterRenderer, encode_png
+from ant_one.swarm import VectorColony
+from ant_one.tau import Tau
+
+
+def test_dirty_mode_paints_the_same_frames_as_full_mode():
+    logging.disable(logging.INFO)
+    tau = Tau(seed=1)
+    world, nest, colony = create_game(tau, px_size=(200, 120), n_ants=300, colony_cls=VectorColony, size=(400, 240))
+    dirty = RasterRenderer(None, world, colony, mode='dirty')
+    full = RasterRenderer(None, world, colony, camera=dirty.camera, mode='full')
+    for step in range(30):
+        tau.run(3)
+        if step == 10:
+            dirty.camera.zoom_at(2, *dirty.camera.to_screen(nest.x, nest.y))
+        dirty.paint()
+        full.paint()
+        assert np.array_equal(dirty.frame, full.frame)
+    assert not np.array_equal(dirty.frame, dirty.background)
+    logging.disable(logging.NOTSET)
+
+
+def test_png_holds_the_pixels():
+    pixels = np.random.default_rng(0).integers(0, 256, (7, 5, 3), dtype=np.uint8)
+    png = encode_png(pixels)
+    assert png.startswith(b'\x89PNG')
+    idat = png[png.index(b'IDAT')+4:png.index(b'IEND')-8]
+    rows = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(7, 1 + 5*3)
+    assert (rows[:, 0] == 0).all()
+    assert np.array_equal(rows[:, 1:].reshape(7, 5, 3), pixels)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from ant_one.events import EventKind
+from ant_one.game_resources import create_game
+from ant_one.recorder import RECORDED, TraceFormatError, TraceReader, TrajectoryRecorder
+from ant_one.swarm import VectorColony
+from ant_one.tau import Tau
+
+
+@pytest.fixture
+def game():
+    tau = Tau(seed=6, sim_dt=0.5)
+    world, nest, colony = create_game(tau=tau, px_size=(400, 300), n_ants=20, colony_cls=VectorColony)
+    return tau, colony
+
+
+def test_trace_reads_back_recorded_ticks(game, tmp_path):
+    tau, colony = game
+    recorder = TrajectoryRecorder(tmp_path / 'game.trace', tau, colony, chunk_ticks=8)
+    tau.add_recorder(recorder)
+    tau.run(12)
+    colony.populate(5)  # Starts a new chunk
+    tau.run(10)
+    states = {name: np.array(column) for name, column in colony.columns().items()}
+    recorder.close()
+    tau.run(1)  # No longer recorded
+
+    with TraceReader(tmp_path / 'game.trace') as trace:
+        frames = list(trace.frames())
+        assert [frame['loopno'] for frame in frames] == list(range(1, 23))
+        assert [len(frame['x']) for frame in frames] == [20]*12 + [25]*10
+        last = frames[-1]
+        np.testing.assert_array_equal(last['idno'], states['idno'])
+        np.testing.assert_array_equal(last['job'], states['job'])
+        assert np.abs(last['x'] - states['x']).max() < 0.01
+        assert np.abs(np.angle(np.exp(1j*(last['o'] - states['o'])))).max() < 0.001
+
+        assert trace.seek(15)['loopno'] == 15
+        np.testing.assert_array_equal(trace.seek(15)['y'], frames[14]['y'])
+        assert [frame['loopno'] for frame in trace.frames(start=7, stop=10)] == [7, 8, 9]
+        assert trace.seek(100) is None
+
+        events = list(trace.events())
+        assert (12, EventKind.BIRTH, 21, 5, None) in events  # Born between ticks 12 and 13
+        assert all(1 <= loopno <= 22 for loopno, *_ in events)
+        assert list(trace.events(start=12, stop=13)) == [event for event in events if event[0] == 12]
+
+
+def test_reader_rejects_unfinished_or_other_files(game, tmp_path):
+    tau, colony = game
+    (tmp_path / 'other').write_bytes(b'not a trace at all')
+    with pytest.raises(TraceFormatError):
+        TraceReader(tmp_path / 'other')
+
+    recorder = TrajectoryRecorder(tmp_path / 'game.trace', tau, colony)
+    recorder.f.flush()
+    with pytest.raises(TraceFormatError):
+        TraceReader(tmp_path / 'game.trace')
+    recorder.close()
+
+
+def test_colonies_build_only_recorded_columns(game):
+    tau, colony = game
+    objects = create_game(tau=tau, px_size=(400, 300), n_ants=20)[2]
+    for engine in (colony, objects):
+        columns = engine.columns(RECORDED)
+        assert list(columns) == list(RECORDED)
+        np.testing.assert_array_equal(columns['x'], engine.columns()['x'])
@@ -0,0 +1,134 @@
+import logging
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+from ant_one.drawings import ANT_ANTENNA_POINTS, ANT_LEG_POINTS, SpriteCache, ant_geometry, line_segments_gen
+from ant_one.game_resources import create_game
+from ant_one.renderer import CanvasRenderer
+from ant_one.swarm import VectorColony
+from ant_one.tau import Tau
+
+
+class Recorder():
+    """Stands for a toga canvas context, counts drawing operations"""
+    def __init__(self):
+        self.children = []
+        self.n_ops = 0
+
+    def clear(self):
+        self.children.clear()
+        self.n_ops = 0
+
+    def __getattr__(self, name):
+        def op(*args, **kwargs):
+            self.n_ops += 1
+        return op
+
+    @contextmanager
+    def Context(self, *args, **kwargs):
+        child = Recorder()
+        self.children.append(child)
+        yield child
+
+    Fill = Stroke = Context
+
+    def total_ops(self):
+        return self.n_ops + sum(child.total_ops() for child in self.children)
+
+
+class FakeCanvas():
+    def __init__(self):
+        self.context = Recorder()
+
+
+@pytest.mark.parametrize('overlay', [False, True])
+def test_density_map_cost_is_bounded_by_canvas_size(overlay):
+    logging.disable(logging.INFO)
+    rng = np.random.default_rng(0)
+    ops = []
+    for n_ants in (10000, 100000):
+        world, _, colony = create_game(Tau(seed=1), px_size=(400, 300), n_ants=n_ants, colony_cls=VectorColony)
+        colony.x[:n_ants] = rng.uniform(0, 400, n_ants)
+        colony.y[:n_ants] = rng.uniform(0, 300, n_ants)
+        renderer = CanvasRenderer(FakeCanvas(), world, colony, density_overlay=overlay)
+        renderer.render()
+        ops.append(renderer.ant_layer.total_ops())
+    n_cells = (400//8) * -(-300//8)
+    overlay_ops = 2*5*renderer.overlay_limit if overlay else 0  # 2 paths of 5 ops and 2 of 2 ops per ant
+    assert 0 < ops[0] <= ops[1] <= n_cells + overlay_ops
+    logging.disable(logging.NOTSET)
+
+
+def test_camera_culls_what_is_out_of_view():
+    logging.disable(logging.INFO)
+    world, nest, colony = create_game(
+        Tau(seed=1), px_size=(400, 300), n_ants=1000, colony_cls=VectorColony, size=(4000, 3000)
+    )
+    colony.x[:1000] = np.linspace(0, 4000, 1000)
+    colony.y[:1000] = 1500
+    renderer = CanvasRenderer(FakeCanvas(), world, colony)
+    camera = renderer.camera
+    assert camera.shows_all() and camera.zoom == 0.1
+
+    camera.zoom_at(10, 200, 150)  # 1 pixel per unit, centered
+    assert camera.to_world(200, 150) == pytest.approx((2000, 1500))
+    renderer.render()
+    in_view = np.abs(colony.x[:1000] - 2000) <= 200 + renderer.cull_margin
+    assert renderer.ant_layer.total_ops() == 14 * in_view.sum()  # 2 paths of 5 ops and 2 of 2 ops per ant
+    assert renderer.static_layer.children[0].total_ops() <= 2 + 2  # Transform, and nest if in view
+
+    version = renderer.static_version
+    camera.pan(-100, 0)
+    renderer.render()
+    assert renderer.static_version != version
+    assert camera.to_world(200, 150) == pytest.approx((2100, 1500))
+    logging.disable(logging.NOTSET)
+
+
+def test_ant_geometry_is_the_polylines_of_the_drawing():
+    geometry = ant_geometry()
+    assert [list(leg) for leg in geometry['legs']] == [
+        list(line_segments_gen(points, x_mirror=x_mirror))
+        for points in ANT_LEG_POINTS.values()
+        for x_mirror in (False, True)
+    ]
+    assert [list(antenna) for antenna in geometry['antennae']] == [
+        list(line_segments_gen(ANT_ANTENNA_POINTS, x_mirror=x_mirror)) for x_mirror in (False, True)
+    ]
+    # Both sides of the body
+    for side, mirrored in zip(geometry['legs'][::2], geometry['legs'][1::2]):
+        assert [(x, -y) for x, y in side] == list(mirrored)
+
+
+class Appender(Recorder):
+    """Recorder that keeps sprites appended to it"""
+    def __init__(self):
+        super().__init__()
+        self.appended = []
+
+    def append(self, sprite):
+        self.appended.append(sprite)
+
+
+def test_sprite_cache_records_once_and_evicts_least_recently_used():
+    cache, context, recorded = SpriteCache(maxsize=2), Appender(), []
+
+    def draw(sprite, key):
+        recorded.append(key)
+        sprite.line_to(0, 0)
+
+    cache.draw(context, 'a', draw, 'a')
+    sprite_a = context.children[0]
+    assert recorded == ['a'] and sprite_a.n_ops == 1
+    cache.draw(context, 'a', draw, 'a')
+    assert recorded == ['a'] and context.appended == [sprite_a]  # Hit: same sprite, not recorded again
+
+    cache.draw(context, 'b', draw, 'b')
+    cache.draw(context, 'a', draw, 'a')  # Now b is the least recently used
+    cache.draw(context, 'c', draw, 'c')
+    assert list(cache.sprites) == ['a', 'c'] and len(cache) == 2
+    cache.draw(context, 'b', draw, 'b')
+    assert recorded == ['a', 'b', 'c', 'b']
+    assert context.appended == [sprite_a, sprite_a]
@@ -0,0 +1,19 @@
+import pytest
+
+from ant_one import savegame, sim
+
+
+@pytest.mark.parametrize('engine', ['object', 'vector'])
+def test_resumed_game_matches_uninterrupted_run(engine, tmp_path):
+    args = ['--ants', '40', '--dt', '0.5', '--seed', '2', '--engine', engine]
+    uninterrupted = sim.main(args + ['--ticks', '60'])
+    sim.main(args + ['--ticks', '35', '--save', str(tmp_path / 'game.save')])
+    resumed = sim.main(['--ticks', '25', '--engine', engine, '--load', str(tmp_path / 'game.save')])
+    assert resumed['digest'] == uninterrupted['digest']
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'settings.pkl'
+    path.write_bytes(b'\x80\x04not a save')
+    with pytest.raises(savegame.SaveFormatError):
+        savegame.load(path)
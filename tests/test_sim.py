@@ -0,0 +1,35 @@
+import inspect
+import sys
+
+import pytest
+
+from ant_one import sim
+from ant_one.game_resources import create_game
+
+
+@pytest.mark.parametrize('engine', sim.ENGINES)
+def test_headless_run(engine, capsys):
+    stats = sim.main(['--ants', '50', '--ticks', '20', '--seed', '1', '--engine', engine])
+    assert stats['ants'] == 50
+    assert sum(stats['jobs'].values()) == 50
+    assert 'ticks/s' in capsys.readouterr().out
+    assert 'toga' not in sys.modules
+
+
+@pytest.mark.parametrize('engine', sim.ENGINES)
+def test_same_seed_replays_bit_for_bit(engine):
+    args = ['--ants', '30', '--ticks', '50', '--dt', '0.5', '--engine', engine]
+    first = sim.main(args + ['--seed', '4'])
+    assert sim.main(args + ['--seed', '4'])['digest'] == first['digest']
+    assert sim.main(args + ['--seed', '5'])['digest'] != first['digest']
+
+
+def test_core_imports_without_presentation():
+    duration, loaded = sim.cold_import()
+    assert duration > 0
+    assert not {'toga', 'ant_one.drawings', 'ant_one.renderer', 'asyncio'} & set(loaded)
+
+
+def test_default_engine_is_the_play_screen_one():
+    play_screen_colony = inspect.signature(create_game).parameters['colony_cls'].default
+    assert sim.ENGINES[sim.parse_args([]).engine] is play_screen_colony
@@ -0,0 +1,224 @@
+import functools
+import logging
+
+import numpy as np
+import pytest
+
+from ant_one.events import EventKind
+from ant_one.game_resources import World, Nest, Colony, ColonyNeed, Food, Job, JOB_CODE, create_game
+from ant_one.shards import ShardedColony, strip_of
+from ant_one.swarm import VectorColony
+from ant_one.tau import Tau
+from ant_one.world_physics import Position
+
+
+@pytest.fixture
+def colony():
+    logging.disable(logging.INFO)
+    tau = Tau()
+    tau.vt_loop_duration = 0.03
+    world = World(tau, px_size=(1000, 600))
+    colony = VectorColony(Nest(world), capacity=4)
+    colony.populate(100)
+    yield colony
+    logging.disable(logging.NOTSET)
+
+
+def test_populate_grows_arrays(colony):
+    assert colony.n_ants == len(colony.population) == 100
+    assert colony.capacity >= 100
+    assert [ant.idno for ant in colony.population[:3]] == [1, 2, 3]
+    assert all(ant.job == Job.JOBLESS for ant in colony.population)
+
+
+def test_ants_stay_within_borders(colony):
+    world = colony.world
+    for _ in range(200):
+        for obj in world.living_objects:
+            obj.live()
+    for ant in colony.population:
+        assert world.no_go_border <= ant.x <= world.size[0]-world.no_go_border
+        assert world.no_go_border <= ant.y <= world.size[1]-world.no_go_border
+
+
+def test_vector_colony_is_not_polled_per_ant(colony):
+    assert list(colony.world.living_objects) == [colony]
+    assert not isinstance(colony.population, list)
+    assert isinstance(Colony(colony.nest).population, list)
+
+
+def test_sharded_colony_survives_growth_and_close():
+    logging.disable(logging.INFO)
+    world, _, colony = create_game(
+        Tau(seed=1), px_size=(1000, 600), n_ants=50, colony_cls=functools.partial(ShardedColony, n_shards=2)
+    )
+    tau = world.tau
+    tau.run(5)
+    colony.populate(2000)  # Grows shared arrays while workers run
+    tau.run(5)
+    colony.close()
+    assert colony.n_ants == 2050
+    assert not colony.segments and not colony.workers
+    assert (colony.x[:colony.n_ants] >= world.no_go_border).all()
+    assert sum(colony.count_jobs().values()) == 2050
+    logging.disable(logging.NOTSET)
+
+
+def test_jobs_are_allocated_in_bulk_with_hysteresis(colony):
+    colony.job_hysteresis = 0.1
+    colony.thresholds[:4, 0] = [0.2, 0.3, 0.4, 0.5]
+    colony.needs[ColonyNeed.GETFOOD] = 0.35
+    colony.allocate_jobs()
+    assert [ant.job for ant in colony.population[:4]] == [Job.FORAGING, Job.FORAGING, Job.JOBLESS, Job.JOBLESS]
+
+    colony.needs[ColonyNeed.GETFOOD] = 0.25  # Still within hysteresis of 0.3
+    colony.allocate_jobs()
+    assert [ant.job for ant in colony.population[:4]] == [Job.FORAGING, Job.FORAGING, Job.JOBLESS, Job.JOBLESS]
+    colony.needs[ColonyNeed.GETFOOD] = 0.15
+    colony.allocate_jobs()
+    assert [ant.job for ant in colony.population[:4]] == [Job.FORAGING, Job.JOBLESS, Job.JOBLESS, Job.JOBLESS]
+    assert colony.job_counts == colony.count_jobs()
+
+    objects = Colony(colony.nest)
+    objects.populate(100)
+    objects.needs = colony.needs
+    for ant, vector_ant in zip(objects.population, colony.population):
+        ant.thresholds, ant.job = vector_ant.thresholds, vector_ant.job
+    colony.needs[ColonyNeed.GETFOOD] = 0.32
+    colony.allocate_jobs()
+    objects.allocate_jobs()
+    assert [ant.job for ant in objects.population] == [ant.job for ant in colony.population]
+
+
+def test_trails_only_lead_to_food_left(colony):
+    world = colony.world
+    colony.follow_trails = True
+    eaten, left = Food(Position(500, 300)), Food(Position(530, 300))
+    world.add_object(left)
+    assert colony.trail_after(eaten) == colony.trail_duration
+    world.remove_object(left)
+    assert colony.trail_after(eaten) == 0  # Nothing in sight
+    # Fading, the trail is strongest next to the food
+    assert colony.trail_deposit(colony.trail_duration, 1) > colony.trail_deposit(1, 1) > 0
+
+
+def food_waiting(follow_trails: bool, seed: int) -> int:
+    """Ticks food spent on the ground, found or not, while 100 ants forage"""
+    tau = Tau(seed=seed)
+    _, _, colony = create_game(tau, px_size=(800, 500), n_ants=100, colony_cls=VectorColony)
+    colony.follow_trails = follow_trails
+    colony.needs[ColonyNeed.GETFOOD] = 1  # All ants forage
+    spawned, waited = {}, []
+
+    def watch(events):
+        for loopno, kind, *fields in events:
+            if kind == EventKind.FOOD_SPAWNED:
+                spawned[tuple(fields[:2])] = loopno
+            elif kind == EventKind.FOOD_FOUND:
+                waited.append(loopno - spawned.pop(tuple(fields[1:3])))
+
+    tau.events.subscribe(watch)
+    tau.run(1500)
+    return sum(waited) + sum(tau.loopno - loopno for loopno in spawned.values())
+
+
+def test_following_trails_finds_food_no_slower():
+    logging.disable(logging.INFO)
+    seeds = range(3, 5)
+    baseline = sum(food_waiting(False, seed) for seed in seeds)
+    assert sum(food_waiting(True, seed) for seed in seeds) <= baseline
+    logging.disable(logging.NOTSET)
+
+
+def one_still_tick(colony_cls) -> tuple:
+    """State after one tick too short for ants to move or turn at random: only steering, eating and trails count"""
+    logging.disable(logging.INFO)
+    tau = Tau(seed=1)
+    tau.vt_loop_duration = 0.004  # max_pace*dt < 0.5, moves round to 0
+    world, _, colony = create_game(tau, px_size=(1000, 600), n_ants=5, colony_cls=colony_cls)
+    colony.follow_trails = True
+    colony.x[:5] = [200, 800, 450, 650, 400]
+    colony.y[:5] = [300, 300, 150, 450, 500]
+    colony.o[:5] = [0, 1, 2, 3, 4]
+    colony.speed_factor_h[:5] = 1  # Fast ants do not turn
+    colony.job[:5] = JOB_CODE[Job.FORAGING]
+    colony.trail[4] = 3
+    if isinstance(colony, ShardedColony):
+        colony.owner[:5] = strip_of(colony.x[:5], world.size[0], colony.n_shards)[:, None]
+    for x, y in [(205, 300), (230, 300), (803, 300), (490, 150)]:  # Eaten with food left, eaten alone, in sight
+        world.add_object(Food(Position(x, y)))
+    world.pheromones.deposit(np.array([660.0]), np.array([450.0]), 10.0)  # Trail for ant 3
+    world.pheromones.update(world.pheromones.period)
+
+    colony.live()
+    events, _, _ = tau.events.drain(0)
+    state = (
+        [event[1:] for event in events if event[1] == EventKind.FOOD_FOUND],
+        colony.x[:5].copy(), colony.y[:5].copy(), colony.o[:5].copy(), colony.trail[:5].copy(),
+        world.pheromones.deposits.copy()
+    )
+    if isinstance(colony, ShardedColony):
+        colony.close()
+    logging.disable(logging.NOTSET)
+    return state
+
+
+def test_sharded_colony_steers_eats_and_lays_trails_as_vector_one():
+    found, x, y, o, trail, deposits = one_still_tick(VectorColony)
+    assert [event[1] for event in found] == [1, 2]
+    assert (x == [200, 800, 450, 650, 400]).all() and (y == [300, 300, 150, 450, 500]).all()
+    assert (o[:4] != [0, 1, 2, 3]).all() and o[4] == 4  # All but ant 4 steered
+    assert trail[0] > 0 and trail[1] == 0 and trail[4] < 3
+    assert deposits.sum() > 0
+
+    sharded = one_still_tick(functools.partial(ShardedColony, n_shards=2))
+    assert sharded[0] == found
+    for vector_array, sharded_array in zip((x, y, o, trail, deposits), sharded[1:]):
+        np.testing.assert_array_equal(sharded_array, vector_array)
+
+
+class ScalarDraws():
+    """Stands for Colony.ants_rng, drawing given numbers one ant after the other"""
+    def __init__(self, uniform: np.ndarray, normal: np.ndarray) -> None:
+        self.uniforms, self.normals = iter(uniform.ravel().tolist()), iter(normal.ravel().tolist())
+
+    def random(self) -> float:
+        return next(self.uniforms)
+
+    def standard_normal(self) -> float:
+        return next(self.normals)
+
+
+class BatchDraws():
+    """Stands for VectorColony.rng, drawing given numbers a row of ants at a time"""
+    def __init__(self, uniform: np.ndarray, normal: np.ndarray) -> None:
+        self.uniforms, self.normals = iter(uniform), iter(normal)
+
+    def random(self, n: int) -> np.ndarray:
+        return next(self.uniforms)
+
+    def normal(self, loc: float, scale: float, n: int) -> np.ndarray:
+        return loc + scale*next(self.normals)
+
+
+def test_object_and_vector_ants_move_alike(colony):
+    ticks, n = 40, colony.n_ants
+    draws = np.random.default_rng(0)
+    uniform, normal = draws.random((ticks, n)), draws.standard_normal((ticks, n))
+    colony.job[:n] = JOB_CODE[Job.FORAGING]  # No attraction to the nest, nor its random turns
+    colony.rng = BatchDraws(uniform, normal)
+    objects = Colony(colony.nest)
+    objects.populate(n)
+    objects.ants_rng = ScalarDraws(uniform, normal)
+    for ant, x, y, o in zip(objects.population, *colony.positions()):
+        ant.position.move_to(x, y, o)
+        ant.job = Job.FORAGING
+
+    for _ in range(ticks):
+        colony.live()
+        for ant in objects.population:
+            ant.live()
+    np.testing.assert_allclose(objects.positions(), colony.positions())
+    np.testing.assert_allclose(
+        objects.columns(('speed_factor_h',))['speed_factor_h'], colony.columns(('speed_factor_h',))['speed_factor_h']
+    )
@@ -0,0 +1,122 @@
+import asyncio
+import datetime
+import time
+
+from ant_one.tau import Tau
+
+
+class Clockwork():
+    """Stands for World, counts simulation steps"""
+    def __init__(self):
+        self.steps = 0
+        self.living_objects = [self]
+
+    def live(self):
+        self.steps += 1
+
+
+def run_loop(tau, seconds):
+    async def bounded():
+        try:
+            await asyncio.wait_for(tau.event_loop_manager(), seconds)
+        except asyncio.TimeoutError:
+            pass
+    asyncio.run(bounded())
+
+
+def test_substeps_follow_virtual_time_and_renders_are_capped():
+    tau = Tau(seed=0, sim_dt=0.01)
+    tau.time_factor = 5
+    tau.max_fps = 20
+    clockwork = Clockwork()
+    tau.add_world(clockwork)
+    tau.add_render(lambda: None)
+
+    run_loop(tau, 0.5)
+    assert tau.frameno <= 0.5*20 + 1
+    assert 0.5*5/0.01 * 0.7 <= clockwork.steps <= 0.5*5/0.01 * 1.1
+    assert tau.vt_loop_duration == 0.01
+
+
+def test_slow_render_is_skipped_but_not_starved():
+    tau = Tau(seed=0)
+    tau.max_fps = 100
+    tau.add_world(Clockwork())
+    tau.add_render(lambda: time.sleep(0.02))
+
+    run_loop(tau, 0.5)
+    assert tau.frameno >= 0.5 / 0.02 * 0.5
+    assert tau.skipped_frames > 0
+
+
+def test_telemetry_times_live_by_object_type():
+    tau = Tau(seed=0)
+    tau.telemetry.size = 4
+    tau.add_world(Clockwork())
+    tau.telemetry.profile(3)
+    tau.run(10)
+
+    summary = tau.telemetry.summary()
+    assert set(summary) == {'tick', 'timers', 'live:Clockwork'}
+    assert summary['tick']['n'] == 10
+    assert len(tau.telemetry.phases['tick'].values) == 4
+    assert summary['tick']['p50'] <= summary['tick']['p99']
+    assert tau.telemetry.profiler is None
+    assert 'function calls' in tau.telemetry.profile_report
+
+
+def test_profile_stops_with_telemetry_disabled():
+    tau = Tau(seed=0)
+    tau.telemetry.enabled = False
+    clockwork = Clockwork()
+    tau.add_world(clockwork)
+    tau.telemetry.profile(3)
+    assert tau.telemetry.profiler is None  # Armed by the next tick
+    tau.run(5)
+
+    assert tau.telemetry.profiler is None
+    assert f'{Clockwork.live.__code__.co_firstlineno}(live)' in tau.telemetry.profile_report
+    assert tau.telemetry.summary() == {}
+
+
+def test_advance_fast_forwards_without_rendering():
+    tau = Tau(seed=0, sim_dt=0.01)
+    clockwork = Clockwork()
+    tau.add_world(clockwork)
+    renders, progress = [], []
+    tau.add_render(lambda: renders.append(tau.loopno))
+
+    async def play():
+        loop = asyncio.ensure_future(tau.event_loop_manager())
+        await asyncio.sleep(0.1)
+        renders.clear()
+        steps = clockwork.steps
+        await tau.advance(datetime.timedelta(minutes=10), on_progress=progress.append, yield_every=0.001)
+        assert clockwork.steps - steps >= 10*60/0.01
+        assert renders == []
+        await asyncio.sleep(0.1)
+        loop.cancel()
+
+    asyncio.run(play())
+    assert renders  # Normal pacing is back
+    assert len(progress) > 1 and progress[-1] == 1
+    assert not tau.fast_forwarding
+
+
+def test_scheduler_runs_due_timers_in_order():
+    tau = Tau(seed=0)
+    calls = []
+    tau.scheduler.at(0.5, calls.append, 'once')
+    every = tau.scheduler.every(0.2, calls.append, 'every')
+    cancelled = tau.scheduler.after(0.1, calls.append, 'cancelled')
+    tau.scheduler.cancel(cancelled)
+
+    tau.add_world(Clockwork())
+    tau.sim_dt = 0.45
+    tau.run(1)
+    assert calls == ['every', 'every']  # Late by two periods: called twice
+    tau.run(1)
+    assert calls == ['every', 'every', 'once', 'every', 'every']  # By due time
+    tau.scheduler.cancel(every)
+    tau.scheduler.advance(1)
+    assert len(calls) == 5 and not every.pending
@@ -0,0 +1,74 @@
+import json
+import pickle
+import threading
+
+from ant_one.user_settings import UserSettings
+
+
+def test_changes_are_coalesced_into_one_atomic_write(tmp_path, monkeypatch):
+    path = tmp_path / 'data' / 'user_settings.json'
+    settings = UserSettings(path, save_delay=60)
+    writes = []
+    write = settings.write
+    monkeypatch.setattr(settings, 'write', lambda data: (writes.append(data), write(data)))
+    for name in ('A', 'An', 'Ant'):
+        settings.name = name
+        settings.save()
+    assert not path.exists()
+    settings.flush()
+    assert len(writes) == 1
+    assert json.loads(path.read_text())['name'] == 'Ant'
+    assert list(path.parent.iterdir()) == [path]
+    assert UserSettings(path).name == 'Ant'
+
+
+def test_legacy_pickle_is_migrated(tmp_path):
+    legacy = UserSettings.__new__(UserSettings)  # As pickled by earlier versions
+    legacy.__dict__.update(_name='Queen', _pimp_color_body='#422E13', settings_path=tmp_path / 'user_settings.pkl')
+    (tmp_path / 'user_settings.pkl').write_bytes(pickle.dumps(legacy))
+    settings = UserSettings(tmp_path / 'user_settings.json')
+    assert (settings.name, settings.pimp_color_body) == ('Queen', '#422E13')
+    assert json.loads((tmp_path / 'user_settings.json').read_text())['version'] == UserSettings.version
+
+
+def test_saves_share_one_writer_thread(tmp_path):
+    path = tmp_path / 'user_settings.json'
+    settings = UserSettings(path, save_delay=0.01)
+    threads = threading.active_count()
+    for name in ('A', 'An', 'Ant'):
+        settings.name = name
+        settings.save()
+    assert threading.active_count() <= threads + 1
+    settings._writer.join(timeout=0.5)  # Never ends, waits for the next save
+    assert json.loads(path.read_text())['name'] == 'Ant'
+    settings.name = 'Queen'
+    settings.save()
+    settings._writer.join(timeout=0.5)
+    assert json.loads(path.read_text())['name'] == 'Queen'
+
+
+def test_corrupt_file_falls_back_to_defaults(tmp_path):
+    path = tmp_path / 'user_settings.json'
+    path.write_text('{"version": 1, "name": "Qu')  # Cut short
+    settings = UserSettings(path)
+    assert settings.name == UserSettings(tmp_path / 'other.json').name
+    settings.save()
+    settings.flush()
+    assert json.loads(path.read_text())['version'] == UserSettings.version
+
+
+def test_binary_or_non_object_file_falls_back_to_defaults(tmp_path):
+    path = tmp_path / 'user_settings.json'
+    default_name = UserSettings(tmp_path / 'other.json').name
+    for content in (b'\x80\xff\x00garbage', b'[1, 2]'):
+        path.write_bytes(content)
+        assert UserSettings(path).name == default_name
+
+
+def test_corrupt_legacy_pickle_falls_back_to_defaults(tmp_path):
+    legacy = UserSettings.__new__(UserSettings)
+    legacy.__dict__.update(_name='Queen')
+    (tmp_path / 'user_settings.pkl').write_bytes(pickle.dumps(legacy)[:20])  # Cut short
+    settings = UserSettings(tmp_path / 'user_settings.json')
+    assert settings.name == UserSettings(tmp_path / 'other.json').name
+    assert not (tmp_path / 'user_settings.json').exists()  # Nothing migrated
@@ -0,0 +1,68 @@
+import math
+import random
+
+import numpy as np
+
+from ant_one.world_physics import NearestIndex, Position, SpatialHash
+
+
+class Thing():
+    def __init__(self, x, y):
+        self.position = Position(x, y)
+
+
+def test_spatial_hash_matches_brute_force():
+    rnd = random.Random(3)
+    index = SpatialHash((1000, 600), cell_size=10)
+    things = [Thing(rnd.uniform(-5, 1005), rnd.uniform(-5, 605)) for _ in range(300)]
+    for thing in things:
+        index.insert(thing)
+    for thing in things[::3]:
+        index.remove(thing)
+    kept = things[1::3] + things[2::3]
+    assert len(index) == len(kept)
+
+    xs = np.array([rnd.uniform(0, 1000) for _ in range(500)])
+    ys = np.array([rnd.uniform(0, 600) for _ in range(500)])
+    point_idx, obj_idx, objects = index.query_pairs(xs, ys, 25)
+    found = {(int(i), id(objects[j])) for i, j in zip(point_idx, obj_idx)}
+
+    expected = set()
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        near = index.query(Position(x, y), 25)
+        assert {id(t) for t in near} == {
+            id(t) for t in kept if Position(x, y).distance_from(t.position) < 25
+        }
+        expected |= {(i, id(t)) for t in near}
+    assert found == expected
+    for x0, y0, x1, y1 in [(100, 50, 180, 90), (-10, -10, 1010, 610), (990, 590, 2000, 2000)]:
+        assert {id(t) for t in index.query_rect(x0, y0, x1, y1)} == {
+            id(t) for t in kept if x0 <= t.position.x <= x1 and y0 <= t.position.y <= y1
+        }
+
+
+def test_nearest_index_matches_brute_force_while_patched():
+    rnd = random.Random(5)
+    index = NearestIndex((1000, 600), cell_size=60)
+    things = []
+    xs = np.array([rnd.uniform(0, 1000) for _ in range(200)])
+    ys = np.array([rnd.uniform(0, 600) for _ in range(200)])
+    for step in range(6):
+        for _ in range(40):
+            things.append(Thing(rnd.uniform(0, 1000), rnd.uniform(0, 600)))
+            index.insert(things[-1])
+        for thing in rnd.sample(things, 15):
+            things.remove(thing)
+            index.remove(thing)
+        assert len(index) == len(things)
+
+        distances, found_x, _ = index.nearest(xs, ys, radius=80, k=2)
+        for i in range(len(xs)):
+            expected = sorted(math.hypot(t.position.x-xs[i], t.position.y-ys[i]) for t in things)
+            expected = [d for d in expected if d < 80][:2]
+            assert np.allclose(distances[i, :len(expected)], expected)
+            assert np.isinf(distances[i, len(expected):]).all() and np.isnan(found_x[i, len(expected):]).all()
+            one = index.nearest_one(xs[i], ys[i], 80)
+            assert (one is None) if not expected else math.isclose(one[0], expected[0])
+    assert 1 < index.packs < 6*40  # Patched between packs
+    assert NearestIndex((1000, 600), cell_size=60).nearest_one(500, 300, 80) is None